@@ -0,0 +1 @@
+"""Benchmarks for the music-theory core. Run modules with ``python -m benchmarks.<name>`` from the repo root."""
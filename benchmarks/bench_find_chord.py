@@ -0,0 +1,94 @@
+"""Compare the permutation scan ``find_chord`` used to do with the mask index.
+
+Every 3-5 note combination of the twelve pitch classes is identified by both
+lookups; exact results must agree and the timings are printed side by side.
+Fuzzy results are only counted, since the index ranks near-matches instead of
+taking the first one found.
+
+    python -m benchmarks.bench_find_chord [--sizes 3 4 5] [--fuzzy]
+"""
+import argparse
+import time
+from itertools import combinations, permutations
+
+from models import Pitch, Key, GenericChord, find_chord, find_chords
+from models.chord_finder import CHORD_DB, CHORD_CLASS_MAP, normalize_semitones
+
+def legacy_find_chord(notes, allow_fuzzy=False):
+    """The pre-index implementation, kept verbatim as the reference."""
+    fuzzy_matches = []
+    if not notes:
+        return None
+
+    note_pcs = [note.pc for note in notes]
+
+    for perm in permutations(notes):
+        root = perm[0]
+        relative_semitones = normalize_semitones(root.pc, note_pcs)
+
+        for chord_type, roots in CHORD_DB.items():
+            for root_name, qualities in roots.items():
+                for quality, data in qualities.items():
+                    target = sorted(data["semitones"])
+
+                    if relative_semitones == target:
+                        key = Key(str(root), "major")
+                        chord_class = CHORD_CLASS_MAP.get(chord_type, GenericChord)
+                        return chord_class(root, quality, key)
+
+                    if allow_fuzzy:
+                        match_count = len(set(relative_semitones).intersection(set(target)))
+                        required = len(target) - 1
+                        if match_count >= required:
+                            fuzzy_matches.append((root, quality, chord_type))
+
+    if fuzzy_matches:
+        root, quality, chord_type = fuzzy_matches[0]
+        key = Key(str(root), "major")
+        chord_class = CHORD_CLASS_MAP.get(chord_type, GenericChord)
+        return chord_class(root, quality, key)
+
+    return GenericChord(notes)
+
+
+def hands(sizes):
+    for size in sizes:
+        for combo in combinations(range(12), size):
+            yield [Pitch(Pitch.default_names[pc]) for pc in combo]
+
+
+def describe(chord):
+    return type(chord).__name__, str(chord.root), chord.quality
+
+
+def timed(func, all_hands, allow_fuzzy):
+    start = time.perf_counter()
+    results = [describe(func(hand, allow_fuzzy)) for hand in all_hands]
+    return time.perf_counter() - start, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 5])
+    parser.add_argument("--fuzzy", action="store_true", help="benchmark allow_fuzzy=True lookups")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        all_hands = list(hands([size]))
+        old_time, old_results = timed(legacy_find_chord, all_hands, args.fuzzy)
+        new_time, new_results = timed(find_chord, all_hands, args.fuzzy)
+        mismatches = sum(old != new for old, new in zip(old_results, new_results))
+        print(f"{size} notes x {len(all_hands):4d}: "
+              f"legacy {old_time * 1e3:9.1f} ms  index {new_time * 1e3:7.1f} ms  "
+              f"speedup {old_time / new_time:7.1f}x  {'reranked' if args.fuzzy else 'mismatches'} {mismatches}")
+        if mismatches and not args.fuzzy:
+            raise SystemExit(f"index results differ from legacy for {mismatches} {size}-note hands")
+        if not args.fuzzy:
+            start = time.perf_counter()
+            find_chords(all_hands)
+            batch_time = time.perf_counter() - start
+            print(f"{'':17s}find_chords {batch_time * 1e3:7.1f} ms (ids only, no chord objects)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure cold ``import models`` and the first chord lookup in fresh processes.
+
+Each run starts a new interpreter outside the repo root, so it also checks
+that the package finds its data files without relying on the working directory.
+
+    python -m benchmarks.bench_import [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+import models
+imported = time.perf_counter()
+models.find_chord([models.Pitch("C"), models.Pitch("E"), models.Pitch("G")])
+first = time.perf_counter()
+print(imported - start, first - imported)
+"""
+
+
+def sample(runs):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="")
+    imports, lookups = [], []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", PROBE], cwd=cwd, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            import_time, lookup_time = map(float, out.split())
+            imports.append(import_time)
+            lookups.append(lookup_time)
+    return imports, lookups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    imports, lookups = sample(args.runs)
+    for label, times in (("import models", imports), ("first find_chord", lookups)):
+        print(f"{label:17s} median {statistics.median(times) * 1e3:7.2f} ms  "
+              f"min {min(times) * 1e3:7.2f} ms  max {max(times) * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
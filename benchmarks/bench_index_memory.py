@@ -0,0 +1,74 @@
+"""Memory footprint and start-up time of the chord index across worker processes.
+
+Starts N fresh (spawned) workers that each load the chord index, either by
+parsing the JSON database or by memory-mapping ``chords_index.bin``, and
+touch every table. Once all workers are loaded they report their private
+and proportional (shared pages split between sharers) memory from
+``/proc/self/smaps_rollup``, so this benchmark needs Linux.
+
+    python -m benchmarks.bench_index_memory [--workers 1 16]
+"""
+import argparse
+import multiprocessing
+import time
+
+
+def _memory_kb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), fields.get("Pss", 0)
+
+
+def _worker(mode, barrier, results):
+    import models.chord_finder as chord_finder
+    if mode == "json":
+        chord_finder.CHORD_INDEX_PATH = None
+    before_private, before_pss = _memory_kb()
+    start = time.perf_counter()
+    index = chord_finder.chord_index()
+    for mask in range(4096):
+        index.matches[mask]
+        index.lookup[mask]
+    load_time = time.perf_counter() - start
+    barrier.wait()  # measure while every worker holds its index
+    private, pss = _memory_kb()
+    results.put((private - before_private, pss - before_pss, pss, load_time))
+    barrier.wait()
+
+
+def run(mode, workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(mode, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args(argv)
+
+    for workers in args.workers:
+        for mode in ("json", "mmap"):
+            rows = run(mode, workers)
+            private = sum(row[0] for row in rows)
+            index_pss = sum(row[1] for row in rows)
+            total_pss = sum(row[2] for row in rows)
+            load = max(row[3] for row in rows)
+            print(f"{workers:3d} workers {mode:4s}: index private {private / 1024:7.2f} MiB  "
+                  f"index pss {index_pss / 1024:7.2f} MiB  total pss {total_pss / 1024:8.2f} MiB  "
+                  f"slowest load {load * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Memory and allocation cost of generating every chord in the database.
+
+Compares the interned ``Pitch`` with the old ``__dict__``-based class on
+per-instance size and construction throughput, then traces allocations while
+every (type, root, quality) chord in ``chords_by_type.json`` is built.
+
+    python -m benchmarks.bench_pitch_memory [--repeat 5]
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from models import Pitch, Key
+from models.chord_finder import CHORD_CLASS_MAP, chord_db
+
+
+class LegacyPitch:
+    """The pre-interning Pitch, kept as the reference for size and speed."""
+    wheel = Pitch.wheel
+
+    def __init__(self, name, octave=None):
+        if name not in self.wheel:
+            raise ValueError(f"Invalid pitch name: {name}")
+        self.name = name
+        self.octave = octave
+        self.pc = self.wheel[name]
+        self.letter = name[0]
+        self.midi = 12 * (octave + 1) + self.pc if octave is not None else None
+
+
+def instance_size(pitch):
+    size = sys.getsizeof(pitch)
+    if hasattr(pitch, "__dict__"):
+        size += sys.getsizeof(pitch.__dict__)
+    return size
+
+
+def construction_rate(cls, names, repeat, rounds=20):
+    """Best constructions per second over ``repeat`` timed runs, after one untimed warm-up pass.
+
+    The warm-up creates every interned instance, so the runs time repeated
+    construction; the one-off cost of the first pass is reported separately.
+    """
+    def one_pass():
+        for octave in range(9):
+            for name in names:
+                cls(name, octave)
+
+    one_pass()
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            one_pass()
+        best = max(best, rounds * 9 * len(names) / (time.perf_counter() - start))
+    return best
+
+
+def first_pass_rate(names, octaves=range(1000, 1009)):
+    """Constructions per second while every Pitch is new (octaves nothing else uses)."""
+    start = time.perf_counter()
+    for octave in octaves:
+        for name in names:
+            Pitch(name, octave)
+    return len(octaves) * len(names) / (time.perf_counter() - start)
+
+
+def generate_all_chords():
+    chords = []
+    for chord_type, roots in chord_db().items():
+        chord_cls = CHORD_CLASS_MAP[chord_type]
+        for root_name, qualities in roots.items():
+            for quality in qualities:
+                root = Pitch(root_name)
+                chords.append(chord_cls(root, quality, Key(str(root), "major")))
+    return chords
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    names = list(Pitch.wheel)
+
+    print(f"instance size: legacy {instance_size(LegacyPitch('C#', 4))} B, "
+          f"interned {instance_size(Pitch('C#', 4))} B")
+    print(f"construction:  legacy {construction_rate(LegacyPitch, names, args.repeat) / 1e6:.2f} M/s, "
+          f"interned {construction_rate(Pitch, names, args.repeat) / 1e6:.2f} M/s "
+          f"(first pass {first_pass_rate(names) / 1e6:.2f} M/s)")
+
+    generate_all_chords()  # warm the database and caches
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    chords = generate_all_chords()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    notes = [note for chord in chords for note in chord.notes]
+    print(f"all chords:    {len(chords)} chords, {len(notes)} notes, "
+          f"{len({id(note) for note in notes})} distinct Pitch objects")
+    print(f"               {elapsed * 1e3:.1f} ms, {blocks} live blocks, {size / 1024:.1f} KiB retained, "
+          f"{peak / 1024:.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Hands per second of the Monte Carlo simulator for different worker counts.
+
+    python -m benchmarks.bench_simulation [--rounds 50000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import time
+
+from models import Game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--hand-size", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    game = Game(seed=0, n_players=args.players, hand_size=args.hand_size)
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        tally = game.simulate(args.rounds, workers=workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = tally
+        assert tally.chords == baseline.chords, "results depend on the worker count"
+        print(f"{workers:3d} workers: {tally.hands / elapsed / 1e3:8.1f} k hands/s  ({elapsed:.2f} s)")
+
+    print(f"mean score {baseline.mean_score:.2f}")
+    for (chord_type, quality), count in baseline.chords.most_common():
+        print(f"  {chord_type or '-':8s} {quality or 'no chord':18s} {count / baseline.hands:8.4%}")
+
+
+if __name__ == "__main__":
+    main()
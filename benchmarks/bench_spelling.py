@@ -0,0 +1,91 @@
+"""Throughput of note spelling before and after the precomputed tables.
+
+The legacy versions scan ``Pitch.wheel`` for every spelling and re-parse the
+interval name on every ``apply_interval``; both are checked against the
+table-driven versions for every input before timing.
+
+    python -m benchmarks.bench_spelling [--repeat 20]
+"""
+import argparse
+import time
+
+from models import Pitch, Key, Triad, SeventhChord, NinthChord, apply_interval
+from models.interval import interval_semitones
+
+
+def legacy_find_spelling(target_pc, letter):
+    for name, pc in Pitch.wheel.items():
+        if pc == target_pc and name[0] == letter:
+            return name
+    raise ValueError(f"Can't find spelling for pitch class {target_pc} and letter {letter}")
+
+
+def legacy_apply_interval(pitch, key, interval_str):
+    semitones = interval_semitones.get(interval_str)
+    if semitones is None:
+        raise ValueError(f"Unsupported interval: {interval_str}")
+    interval_number = int(''.join(filter(str.isdigit, interval_str)))
+    letter_steps = (interval_number - 1) % 7
+    new_letter = Pitch.letters[(Pitch.letters.index(pitch.letter) + letter_steps) % 7]
+    new_pc = (pitch.pc + semitones) % 12
+    new_octave = None if pitch.octave is None else (pitch.pc + pitch.octave * 12 + semitones) // 12
+    return Pitch(legacy_find_spelling(new_pc, new_letter), new_octave)
+
+
+def spelling_cases():
+    return [(pc, letter) for pc in range(12) for letter in Pitch.letters]
+
+
+def interval_cases():
+    roots = [Pitch(name, 4) for name in ["C", "C#", "Db", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]]
+    chord_intervals = set()
+    for chord_cls in (Triad, SeventhChord, NinthChord):
+        for intervals in chord_cls.QUALITY_INTERVALS.values():
+            chord_intervals.update(intervals)
+    return [(root, interval) for root in roots for interval in sorted(chord_intervals)]
+
+
+def attempt(func, *args):
+    try:
+        return func(*args)
+    except ValueError as e:
+        return str(e)
+
+
+def rate(func, cases, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            try:
+                func(*case)
+            except ValueError:
+                pass
+    return repeat * len(cases) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    key = Key("C")
+    spellings = spelling_cases()
+    intervals = [(root, key, interval) for root, interval in interval_cases()]
+    for case in spellings:
+        assert attempt(legacy_find_spelling, *case) == attempt(key.find_spelling, *case), case
+    for case in intervals:
+        assert attempt(legacy_apply_interval, *case) == attempt(apply_interval, *case), case
+
+    rows = [
+        ("find_spelling", legacy_find_spelling, key.find_spelling, spellings),
+        ("apply_interval", legacy_apply_interval, apply_interval, intervals),
+    ]
+    for label, old, new, cases in rows:
+        old_rate = rate(old, cases, args.repeat)
+        new_rate = rate(new, cases, args.repeat)
+        print(f"{label:15s} legacy {old_rate / 1e3:8.1f} k/s  tables {new_rate / 1e3:8.1f} k/s  "
+              f"speedup {new_rate / old_rate:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
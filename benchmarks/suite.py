@@ -0,0 +1,183 @@
+"""Throughput suite for the music-theory core, with baseline regression checks.
+
+Each case reports operations per second (best of ``--repeat`` runs) and the
+results are written as JSON. Given a baseline file, any case whose throughput
+fell by more than ``--threshold`` fails the run with exit status 1.
+Baselines are machine-specific; record one with ``--save-baseline`` on the
+machine that will run the comparison.
+
+    python -m benchmarks.suite [--output results.json] [--baseline benchmarks/baseline.json]
+                               [--save-baseline] [--threshold 0.2] [--repeat 5] [--only find_chord]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+from models import (Pitch, Key, Interval, Triad, SeventhChord, NinthChord, EleventhChord, ThirteenthChord,
+                    apply_interval, find_chord, transpose_all)
+from models.chord_finder import result_cache_clear
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CHORD_CLASSES = [Triad, SeventhChord, NinthChord, EleventhChord, ThirteenthChord]
+
+# (label, root-position notes); inversions rotate the same notes
+FIND_CHORD_HANDS = {
+    3: ["C", "E", "G"],
+    4: ["G", "B", "D", "F"],
+    5: ["D", "F", "A", "C", "E"],
+}
+
+
+def _pitches(names, octave=4):
+    return [Pitch(name, octave) for name in names]
+
+
+def _chord_case(chord_cls):
+    root, key = Pitch("D"), Key("D")
+    qualities = list(chord_cls.QUALITY_INTERVALS)
+
+    def run():
+        for quality in qualities:
+            chord_cls(root, quality, key)
+    return run, len(qualities)
+
+
+def _find_chord_case(size, inverted, fuzzy, cached=True):
+    names = FIND_CHORD_HANDS[size]
+    if inverted:
+        names = names[1:] + names[:1]
+    if fuzzy:
+        names = names[:-1] + ["Db"]  # one wrong note forces the ranked near-match path
+    notes = _pitches(names)
+    if cached:
+        return lambda: find_chord(notes, allow_fuzzy=fuzzy), 1
+    # Clearing the result cache first times the index search itself rather than a cache hit
+    return lambda: (result_cache_clear(), find_chord(notes, allow_fuzzy=fuzzy)), 1
+
+
+def _make_chords_case():
+    from chord_dictionary import make_chords_hierarchical
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_chords_hierarchical(workers=1)
+    return run, 1
+
+
+def cases():
+    """Return {name: (callable, operations per call)}."""
+    names = ["C", "C#", "Db", "Eb", "F#", "Bb"]
+    key, c4 = Key("C"), Pitch("C", 4)
+    intervals = ["m3", "M3", "P5", "m7", "M9"]
+    found = {
+        "pitch": (lambda: [Pitch(name, 4) for name in names], len(names)),
+        "key": (lambda: [Key(name, mode) for name in names for mode in ("major", "minor")], 2 * len(names)),
+        "key.uncached": (lambda: (Key.cache_clear(), Key("Eb", "dorian")), 1),
+        "apply_interval": (lambda: [apply_interval(c4, key, interval) for interval in intervals], len(intervals)),
+        "interval": (lambda: [Interval(c4, Pitch(name, 4)) for name in names], len(names)),
+    }
+    for chord_cls in CHORD_CLASSES:
+        found[f"generate_notes.{chord_cls.__name__}"] = _chord_case(chord_cls)
+    hand = [Triad(Pitch("C"), "major", key), SeventhChord(Pitch("G"), "dominant7", Key("G")),
+            NinthChord(Pitch("D"), "minor9", Key("D"))]
+    found["transpose_all"] = (lambda: transpose_all(hand, "M2"), len(hand))
+    found["transpose_all.notes"] = (lambda: [chord.notes for chord in transpose_all(hand, "M2")], len(hand))
+    for size in FIND_CHORD_HANDS:
+        for inverted in (False, True):
+            for fuzzy in (False, True):
+                name = f"find_chord.{size}{'.inverted' if inverted else ''}{'.fuzzy' if fuzzy else ''}"
+                found[name] = _find_chord_case(size, inverted, fuzzy)
+                found[f"{name}.uncached"] = _find_chord_case(size, inverted, fuzzy, cached=False)
+    found["make_chords_hierarchical"] = _make_chords_case()
+    return found
+
+
+def measure(func, ops, repeat, min_time=0.05):
+    """Best operations per second over ``repeat`` runs of at least ``min_time`` seconds each."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return number * ops / best
+
+
+def run(only=None, repeat=5):
+    results = {}
+    for name, (func, ops) in cases().items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = measure(func, ops, repeat)
+        print(f"{name:32s} {results[name]:14,.0f} ops/s", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline ops/s, current ops/s) for every case slower than ``threshold`` allows."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and current < previous * (1 - threshold):
+            regressions.append((name, previous, current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed fractional throughput drop")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="run only cases starting with these prefixes")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.", file=sys.stderr)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, previous, current in regressions:
+        print(f"REGRESSION {name}: {previous:,.0f} -> {current:,.0f} ops/s "
+              f"({current / previous - 1:+.0%})", file=sys.stderr)
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
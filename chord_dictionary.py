@@ -1,61 +1,244 @@
+import argparse
+import hashlib
 import json
-from collections import defaultdict
-from models import Triad, SeventhChord, NinthChord, Pitch, Key
-
-def make_chords_hierarchical():
-    """Generate a nested dictionary of chords organized by type -> root -> quality."""
-    chord_classes = {
-        "triad": {
-            "major": Triad,
-            "minor": Triad,
-            "diminished": Triad,
-            "augmented": Triad,
-            "suspended2": Triad,
-            "suspended4": Triad
-        },
-        "seventh": {
-            "major7": SeventhChord,
-            "dominant7": SeventhChord,
-            "minor7": SeventhChord,
-            "diminished7": SeventhChord,
-            "half-diminished7": SeventhChord,
-            "minor-major7": SeventhChord,
-            "augmented7": SeventhChord
-        },
-        "ninth": {
-            "major9": NinthChord,
-            "dominant9": NinthChord,
-            "minor9": NinthChord,
-            "add9": NinthChord,
-            "diminished9": NinthChord,
-            "half-diminished9": NinthChord,
-            "minor-major9": NinthChord,
-            "augmented9": NinthChord
-        }
-    }
-
-    roots = ["C", "C#", "Db", "D", "D#", "Eb", "E", "F", "F#", "Gb", "G", "G#", "Ab", "A", "A#", "Bb", "B"]
-    output = defaultdict(lambda: defaultdict(dict))
-
-    for chord_type, qualities in chord_classes.items():
-        for quality, chord_cls in qualities.items():
-            for root_name in roots:
-                root = Pitch(root_name)
-                key = Key(str(root), "major")
-                try:
-                    chord = chord_cls(root, quality, key)
-                    output[chord_type][root_name][quality] = {
-                        "notes": [str(n) for n in chord.notes],
-                        "semitones": sorted((n.pc - root.pc) % 12 for n in chord.notes)
-                    }
-                except Exception:
+import os
+from concurrent.futures import ProcessPoolExecutor
+from models import directory, Triad, SeventhChord, NinthChord, EleventhChord, ThirteenthChord, Pitch, Key
+from models.chord_index import ChordIndex, pc_mask, source_hash, write_binary_index
+
+CHORD_FAMILIES = {
+    "triad": Triad,
+    "seventh": SeventhChord,
+    "ninth": NinthChord,
+    "eleventh": EleventhChord,
+    "thirteenth": ThirteenthChord
+}
+# Families shipped in chords_by_type.json; the others are generated on request
+DEFAULT_FAMILIES = ["triad", "seventh", "ninth"]
+
+ROOTS = ["C", "C#", "Db", "D", "D#", "Eb", "E", "F", "F#", "Gb", "G", "G#", "Ab", "A", "A#", "Bb", "B"]
+
+CHORDS_PATH = os.path.join(directory, "chords_by_type.json")
+COMPACT_PATH = os.path.join(directory, "chords_by_type.min.json")
+INDEX_PATH = os.path.join(directory, "chords_index.bin")
+MANIFEST_PATH = os.path.join(directory, "chords_manifest.json")
+MODES_PATH = os.path.join(directory, "chords_by_mode.json")
+
+# Bump to force a full rebuild when the generated entry format changes
+GENERATOR_VERSION = 1
+
+
+def definition_hash(*parts):
+    """Content hash of everything an entry is generated from."""
+    payload = json.dumps([GENERATOR_VERSION, ROOTS, *parts], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def quality_hash(chord_type, quality):
+    return definition_hash(chord_type, quality, CHORD_FAMILIES[chord_type].QUALITY_INTERVALS[quality])
+
+
+def mode_hash(mode):
+    return definition_hash(mode, Key.mode_patterns[mode])
+
+
+def build_quality(chord_type, quality):
+    """Build one quality for every root. Returns (entries by root, failed roots)."""
+    chord_cls = CHORD_FAMILIES[chord_type]
+    entries, failures = {}, []
+    for root_name in ROOTS:
+        root = Pitch(root_name)
+        key = Key(str(root), "major")
+        try:
+            chord = chord_cls(root, quality, key)
+            entries[root_name] = {
+                "notes": [str(n) for n in chord.notes],
+                "semitones": sorted((n.pc - root.pc) % 12 for n in chord.notes)
+            }
+        except Exception:
+            failures.append(root_name)
+    return entries, failures
+
+
+def build_mode(mode, chords):
+    """Harmonize every tonic's scale in ``mode`` with stacked-third triads and sevenths.
+
+    Each degree records its root and the qualities found in ``chords`` (None
+    when the stack is not a known chord). Only seven-note modes stack in thirds.
+    """
+    index = ChordIndex(chords)
+    entries, failures = {}, []
+    for tonic in ROOTS:
+        try:
+            scale = Key(tonic, mode).scale[:-1]
+        except ValueError:
+            failures.append(tonic)
+            continue
+        degrees = []
+        for i, root in enumerate(scale):
+            stack = [scale[(i + step) % 7] for step in (0, 2, 4, 6)]
+            triad = index.match(pc_mask(p.pc for p in stack[:3]), root.pc)
+            seventh = index.match(pc_mask(p.pc for p in stack), root.pc)
+            degrees.append({
+                "degree": i + 1,
+                "root": str(root),
+                "triad": triad.quality if triad else None,
+                "seventh": seventh.quality if seventh else None,
+                "notes": [str(p) for p in stack]
+            })
+        entries[tonic] = degrees
+    return entries, failures
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _run(jobs, func, workers):
+    """Run ``func(*job)`` for every job, fanned out over processes when there is enough work."""
+    if workers == 1 or len(jobs) <= 1:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *zip(*jobs)))
+
+
+def chord_hashes(families=None):
+    """Manifest entries ({"type/quality": definition hash}) for ``families``."""
+    return {f"{chord_type}/{quality}": quality_hash(chord_type, quality)
+            for chord_type in families or DEFAULT_FAMILIES
+            for quality in CHORD_FAMILIES[chord_type].QUALITY_INTERVALS}
+
+
+def stale_qualities(families=None, previous=None, manifest=None):
+    """(type, quality) pairs whose hash differs from ``manifest`` or that ``previous`` lacks for some root."""
+    previous = previous or {}
+    manifest = manifest or {}
+    stale = []
+    for name, value in chord_hashes(families).items():
+        chord_type, quality = name.split("/")
+        cached = [previous.get(chord_type, {}).get(root, {}).get(quality) for root in ROOTS]
+        if manifest.get(name) != value or None in cached:
+            stale.append((chord_type, quality))
+    return stale
+
+
+def make_chords_hierarchical(families=None, previous=None, manifest=None, workers=None):
+    """Generate a nested dictionary of chords organized by type -> root -> quality.
+
+    Only the :func:`stale_qualities` are rebuilt; the rest are copied from
+    ``previous``. The manifest to store alongside comes from :func:`chord_hashes`.
+    """
+    families = families or DEFAULT_FAMILIES
+    stale = stale_qualities(families, previous, manifest)
+    built = dict(zip(stale, _run(stale, build_quality, workers)))
+
+    output = {}
+    for chord_type in families:
+        output[chord_type] = {root: {} for root in ROOTS}
+        for quality in CHORD_FAMILIES[chord_type].QUALITY_INTERVALS:
+            if (chord_type, quality) in built:
+                entries, failures = built[chord_type, quality]
+                for root_name in failures:
                     print(f"Error creating {chord_type} chord: {root_name} {quality}")
-                    continue
+            else:
+                entries = {root: previous[chord_type][root][quality] for root in ROOTS}
+            for root_name, entry in entries.items():
+                output[chord_type][root_name][quality] = entry
+    return output
+
+
+def _harmonized_modes(modes):
+    # Only seven-note modes stack in thirds
+    return [mode for mode in modes if len(Key.mode_patterns[mode]) == 7]
+
+
+def mode_hashes(chords, modes):
+    """Manifest entries ({"mode/name": hash}) for ``modes`` harmonized with ``chords``."""
+    chords_hash = definition_hash(chords)
+    return {f"mode/{mode}": definition_hash(mode_hash(mode), chords_hash) for mode in _harmonized_modes(modes)}
+
+
+def stale_modes(chords, modes, previous=None, manifest=None):
+    """Modes whose hash differs from ``manifest`` or that ``previous`` lacks."""
+    previous = previous or {}
+    manifest = manifest or {}
+    return [name[len("mode/"):] for name, value in mode_hashes(chords, modes).items()
+            if manifest.get(name) != value or name[len("mode/"):] not in previous]
+
+
+def make_chords_by_mode(chords, modes, previous=None, manifest=None, workers=None):
+    """Generate mode -> tonic -> degree harmonizations.
 
+    Only the :func:`stale_modes` are rebuilt; the rest are copied from
+    ``previous``. The manifest to store alongside comes from :func:`mode_hashes`.
+    """
+    stale = stale_modes(chords, modes, previous, manifest)
+    built = dict(zip(stale, _run([(mode, chords) for mode in stale], build_mode, workers)))
+
+    output = {}
+    for mode in _harmonized_modes(modes):
+        if mode in built:
+            entries, failures = built[mode]
+            for tonic in failures:
+                print(f"Error creating {mode} scale on {tonic}")
+            output[mode] = entries
+        else:
+            output[mode] = previous[mode]
     return output
 
-if __name__ == "__main__":
-    data = make_chords_hierarchical()
-    with open("models/chords_by_type.json", "w") as f:
-        json.dump(data, f, indent=2)
+
+def _write(path, data, **dump_args):
+    with open(path, "w") as f:
+        json.dump(data, f, **dump_args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate the chord dictionaries under models/.")
+    parser.add_argument("--families", nargs="+", default=DEFAULT_FAMILIES,
+                        help=f"chord families to include ({', '.join(CHORD_FAMILIES)}, or 'all')")
+    parser.add_argument("--modes", nargs="*", default=[],
+                        help="also harmonize these Key modes into chords_by_mode.json ('all' for every mode)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild everything")
+    parser.add_argument("--index-only", action="store_true",
+                        help="only recompile chords_index.bin from the existing chords_by_type.json")
+    args = parser.parse_args(argv)
+
+    if args.index_only:
+        write_binary_index(_load(CHORDS_PATH), INDEX_PATH, source_hash(CHORDS_PATH))
+        print("chords_index.bin generated successfully.")
+        return
+
+    families = list(CHORD_FAMILIES) if args.families == ["all"] else args.families
+    modes = list(Key.mode_patterns) if args.modes == ["all"] else args.modes
+    manifest = {} if args.force else _load(MANIFEST_PATH)
+
+    previous = _load(CHORDS_PATH)
+    stale = stale_qualities(families, previous, manifest)
+    data = make_chords_hierarchical(families, previous, manifest, args.workers)
+    hashes = chord_hashes(families)
+    print(f"{len(stale)} of {len(hashes)} chord qualities regenerated.")
+    _write(CHORDS_PATH, data, indent=2)
+    # Generated copies record which chords_by_type.json they came from, so stale ones are ignored
+    source = source_hash(CHORDS_PATH)
+    _write(COMPACT_PATH, {"source": source, "chords": data}, separators=(",", ":"))
+    write_binary_index(data, INDEX_PATH, source)
+    if modes:
+        previous_modes = _load(MODES_PATH)
+        stale = stale_modes(data, modes, previous_modes, manifest)
+        by_mode = make_chords_by_mode(data, modes, previous_modes, manifest, args.workers)
+        _write(MODES_PATH, by_mode, indent=2)
+        print(f"{len(stale)} of {len(by_mode)} modes regenerated.")
+        hashes.update(mode_hashes(data, modes))
+    else:
+        hashes.update((name, value) for name, value in manifest.items() if name.startswith("mode/"))
+    _write(MANIFEST_PATH, hashes, indent=2, sort_keys=True)
     print("chords_by_type.json generated successfully.")
+
+
+if __name__ == "__main__":
+    main()
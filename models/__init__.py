@@ -1,21 +1,32 @@
+import os
+
+# Package data (chords_by_type.json) is resolved from here, not the working directory
+directory = os.path.dirname(__file__)
+
 from .note import Pitch
-from .interval import Interval, apply_interval
+from .interval import Interval, apply_interval, intervals_matrix
 from .key import Key
-from .chords import Chord, Triad, SeventhChord, NinthChord, GenericChord
-from .chord_finder import find_chord
-# from .hand import Hand
-# from .deck import Deck
-# from .player import Player
-# from .round import Round
-# from .game import Game
-# from .modifier import Modifier
-import os
+from .chords import Chord, Triad, SeventhChord, NinthChord, EleventhChord, ThirteenthChord, GenericChord, transpose_all
+from .chord_finder import find_chord, find_chords, identify_voicing
+from .progression import ProgressionAnalyzer, analyze_progression
+from .hand import Hand
+from .deck import Deck
+from .round import Round
+from .game import Game
+from .player import Player
+from .search import best_hands
+from .modifier import Modifier, ModifierStack
+from .voice_leading import voice_leading, progression_distances, rank_next
+from .session import Session, ActionLog, replay
 __all__ = ["Pitch",
-           "Interval", "apply_interval",
+           "Interval", "apply_interval", "intervals_matrix",
            "Key",
-           "Chord", "Triad", "SeventhChord", "NinthChord", "GenericChord",
-            "find_chord"
-
-           ]
+           "Chord", "Triad", "SeventhChord", "NinthChord", "EleventhChord", "ThirteenthChord", "GenericChord", "transpose_all",
+            "find_chord", "find_chords", "identify_voicing",
+           "ProgressionAnalyzer", "analyze_progression",
+           "Hand", "Deck", "Player", "Round", "Game", "best_hands",
+           "Modifier", "ModifierStack",
+           "voice_leading", "progression_distances", "rank_next",
+           "Session", "ActionLog", "replay",
 
-directory = os.path.dirname(__file__)
\ No newline at end of file
+           ]
\ No newline at end of file
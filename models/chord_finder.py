@@ -1,54 +1,444 @@
+import heapq
 import json
-from models import Pitch, Key, Triad, SeventhChord, NinthChord, GenericChord
-from itertools import permutations
+import operator
+import os
+import threading
+import warnings
+from array import array
+from collections import OrderedDict, namedtuple
+from time import perf_counter_ns
+from models import directory, instrumentation, Pitch, Key, Triad, SeventhChord, NinthChord, EleventhChord, ThirteenthChord, GenericChord
+from models.chord_index import ChordIndex, MappedChordIndex, pc_mask, rotate_mask, source_hash
 
-# Load precomputed chord data
-with open("models/chords_by_type.json") as f:
-    CHORD_DB = json.load(f)
+CHORD_DB_PATH = os.path.join(directory, "chords_by_type.json")
+# Same data without indentation, written alongside by chord_dictionary.py as
+# {"source": sha1 of chords_by_type.json, "chords": {...}}
+CHORD_DB_COMPACT_PATH = os.path.join(directory, "chords_by_type.min.json")
+# Compiled, memory-mappable index of the same data; set to None to build from the JSON instead
+CHORD_INDEX_PATH = os.path.join(directory, "chords_index.bin")
+
+# Precomputed chord data is parsed on first use, not at import
+_chord_db = None
+_chord_index = None
+
+def _source():
+    # Generated files are only used when built from the current chords_by_type.json
+    try:
+        return source_hash(CHORD_DB_PATH)
+    except OSError:
+        return None  # no JSON to compare against: trust the generated files
+
+def _stale(path):
+    warnings.warn(f"{path} was not built from the current {CHORD_DB_PATH}; using the JSON instead",
+                  RuntimeWarning, stacklevel=3)
+
+def _load_compact(source):
+    if not CHORD_DB_COMPACT_PATH or not os.path.exists(CHORD_DB_COMPACT_PATH):
+        return None
+    with open(CHORD_DB_COMPACT_PATH) as f:
+        compact = json.load(f)
+    if "chords" in compact and source in (None, compact.get("source")):
+        return compact["chords"]
+    _stale(CHORD_DB_COMPACT_PATH)
+    return None
+
+def chord_db():
+    """Return the parsed chord database, loading it on first call.
+
+    The compact copy is read when it was built from the current
+    ``chords_by_type.json``; after a hand edit the JSON itself is read.
+    """
+    global _chord_db
+    if _chord_db is None:
+        data = _load_compact(_source())
+        if data is None:
+            with open(CHORD_DB_PATH) as f:
+                data = json.load(f)
+        _chord_db = data
+    return _chord_db
+
+def chord_index():
+    """Return the shared ChordIndex, loading it on first call.
+
+    The binary index is memory-mapped when it was built from the current
+    JSON, so worker processes share its pages; otherwise the index is built
+    from the JSON database.
+    """
+    global _chord_index
+    if _chord_index is None:
+        if CHORD_INDEX_PATH and os.path.exists(CHORD_INDEX_PATH):
+            mapped = MappedChordIndex(CHORD_INDEX_PATH)
+            if _source() in (None, mapped.source):
+                _chord_index = mapped
+            else:
+                _stale(CHORD_INDEX_PATH)
+        if _chord_index is None:
+            _chord_index = ChordIndex(chord_db())
+    return _chord_index
+
+def __getattr__(name):
+    # CHORD_DB / CHORD_INDEX stay importable as module attributes
+    if name == "CHORD_DB":
+        return chord_db()
+    if name == "CHORD_INDEX":
+        return chord_index()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 CHORD_CLASS_MAP = {
     "triad": Triad,
     "seventh": SeventhChord,
-    "ninth": NinthChord
+    "ninth": NinthChord,
+    "eleventh": EleventhChord,
+    "thirteenth": ThirteenthChord
 }
 
 def normalize_semitones(root_pc, note_pcs):
     return sorted((pc - root_pc) % 12 for pc in note_pcs)
 
+def _build_chord(root, entry):
+    key = Key(root.name, "major")
+    chord_class = CHORD_CLASS_MAP.get(entry.chord_type, GenericChord)
+    return chord_class(root, entry.quality, key)
+
+class ChordCandidate(namedtuple("ChordCandidate", ["chord_type", "quality", "root", "missing", "extra"])):
+    """A ranked near-match: ``missing`` chord tones absent from the hand, ``extra`` hand notes outside the chord."""
+    __slots__ = ()
+
+    @property
+    def distance(self):
+        return self.missing + self.extra
+
+    def chord(self):
+        chord_class = CHORD_CLASS_MAP.get(self.chord_type, GenericChord)
+        return chord_class(self.root, self.quality, Key(self.root.name, "major"))
+
+
+def rank_chords(notes, top_k=5, max_missing=1):
+    """Return up to ``top_k`` chords nearest to ``notes``, best first.
+
+    Candidates are ranked by total distance (missing + extra notes), then by
+    fewer missing notes, then by the order the root appears in ``notes`` and
+    the database order. Scanning stops once ``top_k`` perfect matches are found.
+    """
+    if not notes or top_k <= 0:
+        return []
+
+    index = chord_index()
+    mask = pc_mask(note.pc for note in notes)
+    roots = {}
+    for note in notes:
+        roots.setdefault(note.pc, note)
+
+    best = []  # max-heap by rank via negated keys
+    for root_rank, (root_pc, root) in enumerate(roots.items()):
+        relative = rotate_mask(mask, root_pc)
+        outside = ~relative & 0xFFF
+        for entry_id, entry in enumerate(index.entries):
+            missing = (entry.mask & outside).bit_count()
+            if missing > max_missing:
+                continue
+            extra = (relative & ~entry.mask).bit_count()
+            rank = (missing + extra, missing, root_rank, entry_id)
+            if len(best) < top_k:
+                heapq.heappush(best, (tuple(-r for r in rank), entry, root, missing, extra))
+            elif rank < tuple(-r for r in best[0][0]):
+                heapq.heapreplace(best, (tuple(-r for r in rank), entry, root, missing, extra))
+        if len(best) == top_k and best[0][0][0] == 0:
+            break  # the heap is full of perfect matches
+    if instrumentation.enabled:
+        instrumentation.count("rank_chords.roots", root_rank + 1)
+        instrumentation.count("rank_chords.comparisons", (root_rank + 1) * len(index.entries))
+
+    best.sort(reverse=True)
+    return [ChordCandidate(entry.chord_type, entry.quality, root, missing, extra)
+            for _, entry, root, missing, extra in best]
+
+
+# Bounded LRU of search results keyed on (pitch-class mask, doubled, allow_fuzzy).
+# Values hold every candidate root, so the caller's note order still picks the root.
+result_cache_maxsize = 4096
+_results = OrderedDict()
+_results_lock = threading.Lock()
+_result_hits = 0
+_result_misses = 0
+
+
+def result_cache_info():
+    """Return result cache counters as a dict: hits, misses, size and maxsize."""
+    with _results_lock:
+        return {"hits": _result_hits, "misses": _result_misses,
+                "size": len(_results), "maxsize": result_cache_maxsize}
+
+
+def result_cache_clear():
+    global _result_hits, _result_misses
+    with _results_lock:
+        _results.clear()
+        _result_hits = _result_misses = 0
+
+
+def _search(mask, doubled, allow_fuzzy):
+    """Candidate roots for a pitch-class set as (distance, missing, entry_id, root_pc) tuples.
+
+    Exact matches need distinct pitch classes. Otherwise, when fuzzy, each
+    root keeps its nearest entry missing at most one note, ranked as in
+    :func:`rank_chords`.
+    """
+    index = chord_index()
+    if instrumentation.enabled:
+        instrumentation.count("find_chord.probes")
+    if not doubled:
+        exact = index.matches[mask]
+        if exact:
+            return tuple((0, 0, entry_id, root_pc) for root_pc, entry_id in exact)
+    if not allow_fuzzy:
+        return ()
+    options = []
+    for root_pc in range(12):
+        if not mask >> root_pc & 1:
+            continue
+        relative = rotate_mask(mask, root_pc)
+        outside = ~relative & 0xFFF
+        best = None
+        for entry_id, entry in enumerate(index.entries):
+            missing = (entry.mask & outside).bit_count()
+            if missing > 1:
+                continue
+            rank = ((relative & ~entry.mask).bit_count() + missing, missing, entry_id)
+            if best is None or rank < best:
+                best = rank
+        if best is not None:
+            options.append((*best, root_pc))
+    if instrumentation.enabled:
+        instrumentation.count("find_chord.fuzzy_comparisons", mask.bit_count() * len(index.entries))
+    return tuple(options)
+
+
+def _lookup(notes, allow_fuzzy):
+    """Return (root note, entry, exact) for ``notes``, or None; results are cached by pitch-class set."""
+    global _result_hits, _result_misses
+    mask = 0
+    for note in notes:
+        mask |= 1 << note.pc
+    doubled = len(notes) != mask.bit_count()
+    cache_key = (mask, doubled, allow_fuzzy)
+
+    with _results_lock:
+        options = _results.get(cache_key)
+        if options is not None:
+            _results.move_to_end(cache_key)
+            _result_hits += 1
+        else:
+            _result_misses += 1
+    if instrumentation.enabled:
+        instrumentation.count("find_chord.cache_hits" if options is not None else "find_chord.cache_misses")
+    if options is None:
+        options = _search(mask, doubled, allow_fuzzy)
+        if result_cache_maxsize > 0:
+            with _results_lock:
+                _results[cache_key] = options
+                while len(_results) > result_cache_maxsize:
+                    _results.popitem(last=False)
+
+    if not options:
+        return None
+    if len(options) == 1:
+        distance, _, entry_id, root_pc = options[0]
+    else:
+        # Several roots: nearest first, then earliest in the caller's notes, as the search did
+        order = {}
+        for note in notes:
+            order.setdefault(note.pc, len(order))
+        distance, _, entry_id, root_pc = min(options, key=lambda o: (o[0], o[1], order[o[3]], o[2]))
+    for root in notes:
+        if root.pc == root_pc:
+            return root, chord_index().entries[entry_id], not doubled and distance == 0
+
+
+def lookup_chord(notes, allow_fuzzy=False):
+    """Return (root_pc, chord_type, quality) as :func:`find_chord` would identify ``notes``, or None."""
+    found = _lookup(notes, allow_fuzzy) if notes else None
+    if found is None:
+        return None
+    root, entry, _ = found
+    return root.pc, entry.chord_type, entry.quality
+
+
 def find_chord(notes, allow_fuzzy=False):
-    fuzzy_matches = []
+    """Identify ``notes`` as a chord, or a GenericChord when nothing matches.
+
+    Every note is tried as the root in input order, as the permutation
+    search did; doubled pitch classes can never match exactly. With
+    ``allow_fuzzy`` the nearest chord missing at most one note is taken.
+    Searches are cached per pitch-class set and the root is spelled from
+    the caller's notes.
+    """
     if not notes:
         return None
+    start = perf_counter_ns() if instrumentation.enabled else 0
+
+    found = _lookup(notes, allow_fuzzy)
+    if found is None:
+        chord, path = GenericChord(notes), "generic"
+    else:
+        root, entry, exact = found
+        chord, path = _build_chord(root, entry), "exact" if exact else "fuzzy"
+    if start:
+        _observe_find_chord(start, notes, path)
+    return chord
+
+
+def _observe_find_chord(start, notes, path):
+    # Timings are split by hand shape (note count and outcome) so spikes can be attributed
+    ns = perf_counter_ns() - start
+    shape = f"find_chord.{len(notes)}.{path}"
+    sample = " ".join(str(note) for note in notes)
+    instrumentation.record("find_chord", ns, sample)
+    instrumentation.record(shape, ns, sample)
+    instrumentation.count(shape)
+
+
+class Voicing(namedtuple("Voicing", ["chord", "root", "bass", "inversion", "name"])):
+    """A chord as voiced: ``inversion`` counts chord tones below the root (0 is root position)."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"{self.name} (inversion {self.inversion})"
+
+
+def identify_voicing(notes):
+    """Identify a voiced chord, keeping its bass note and inversion.
+
+    Notes are ordered by MIDI number when every note has an octave, otherwise
+    they are read bottom-up in the order given. Doubled notes are allowed. The
+    root comes from a single probe of the mask table, preferring the bass
+    when a symmetric chord could have several roots. Returns None when the
+    pitch classes do not form a known chord.
+    """
+    if not notes:
+        return None
+    if all(note.midi is not None for note in notes):
+        notes = sorted(notes, key=lambda note: note.midi)
+    bass = notes[0]
+
+    index = chord_index()
+    found = index.matches[pc_mask(note.pc for note in notes)]
+    if not found:
+        return None
+    by_root = dict(found)
+    root_pc = bass.pc if bass.pc in by_root else next(note.pc for note in notes if note.pc in by_root)
+    root = next(note for note in notes if note.pc == root_pc)
+    entry = index.entries[by_root[root_pc]]
+
+    inversion = entry.tones.index((bass.pc - root_pc) % 12)
+    name = f"{root.name}{entry.quality}"
+    if inversion:
+        name += f"/{bass.name}"
+    return Voicing(_build_chord(root, entry), root, bass, inversion, name)
+
+
+def _row_pcs(row):
+    """Pitch classes of one hand: Pitch objects or bare pitch-class integers."""
+    return [note.pc if isinstance(note, Pitch) else int(note) % 12 for note in row]
+
+def _match_row(row, matches):
+    """Return (root_pc, entry_id) for one hand row, or None."""
+    try:
+        # A bare integer is a pitch-class mask; roots are tried from the lowest pc
+        mask = operator.index(row)
+        found = matches[mask & 0xFFF]
+        return found[0] if found else None
+    except TypeError:
+        pass
+
+    pcs = _row_pcs(row)
+    mask = pc_mask(pcs)
+    found = matches[mask]
+    # Doubled pitch classes never match, as in find_chord
+    if not found or len(pcs) != mask.bit_count():
+        return None
+    if len(found) == 1:
+        return found[0]
+    # Several notes work as the root (augmented, diminished7): first in the hand wins
+    by_root = dict(found)
+    for pc in pcs:
+        if pc in by_root:
+            return pc, by_root[pc]
+
+
+class ChordMatches:
+    """Compact results of :func:`find_chords`.
+
+    ``type_ids``, ``quality_ids`` and ``roots`` are parallel ``array('b')``
+    columns holding -1 where a hand matched nothing. Ids index
+    ``index.types`` and ``index.qualities``. Chord objects are only built
+    when :meth:`chord` or :meth:`chords` is called.
+    """
+
+    def __init__(self, index, rows):
+        self.index = index
+        self.rows = rows
+        self.type_ids = array("b")
+        self.quality_ids = array("b")
+        self.roots = array("b")
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, i):
+        """Return (chord_type, quality, root_pc) for hand ``i``, or None."""
+        if self.roots[i] < 0:
+            return None
+        return self.index.types[self.type_ids[i]], self.index.qualities[self.quality_ids[i]], self.roots[i]
+
+    def _notes(self, i):
+        row = self.rows[i]
+        try:
+            mask = operator.index(row)
+            return [Pitch(Pitch.default_names[pc]) for pc in range(12) if mask >> pc & 1]
+        except TypeError:
+            return [note if isinstance(note, Pitch) else Pitch(Pitch.default_names[int(note) % 12])
+                    for note in row]
+
+    def chord(self, i):
+        """Build the chord object for hand ``i`` the way ``find_chord`` would."""
+        notes = self._notes(i)
+        if not notes:
+            return None
+        root_pc = self.roots[i]
+        if root_pc < 0:
+            return GenericChord(notes)
+        root = next(note for note in notes if note.pc == root_pc)
+        chord_class = CHORD_CLASS_MAP.get(self.index.types[self.type_ids[i]], GenericChord)
+        return chord_class(root, self.index.qualities[self.quality_ids[i]], Key(root.name, "major"))
+
+    def chords(self):
+        return [self.chord(i) for i in range(len(self))]
+
+
+def find_chords(hands):
+    """Identify many hands at once.
 
-    note_pcs = [note.pc for note in notes]
-
-    # Try all permutations as possible inversions
-    for perm in permutations(notes):
-        root = perm[0]
-        relative_semitones = normalize_semitones(root.pc, note_pcs)
-
-        for chord_type, roots in CHORD_DB.items():
-            for root_name, qualities in roots.items():
-                for quality, data in qualities.items():
-                    target = sorted(data["semitones"])
-
-                    if relative_semitones == target:
-                        root_pitch = root
-                        key = Key(str(root), "major")
-                        chord_class = CHORD_CLASS_MAP.get(chord_type, GenericChord)
-                        return chord_class(root_pitch, quality, key)
-
-                    if allow_fuzzy:
-                        match_count = len(set(relative_semitones).intersection(set(target)))
-                        required = len(target) - 1  # allow one note to be missing
-                        if match_count >= required:
-                            fuzzy_matches.append((root, quality, chord_type))
-
-    if fuzzy_matches:
-        # fallback to first fuzzy match
-        root, quality, chord_type = fuzzy_matches[0]
-        key = Key(str(root), "major")
-        chord_class = CHORD_CLASS_MAP.get(chord_type, GenericChord)
-        return chord_class(root, quality, key)
-
-    return GenericChord(notes)
+    Each hand may be a list of ``Pitch`` objects, a sequence of pitch-class
+    integers, or a single integer pitch-class mask; NumPy arrays of either
+    form work row by row. Each row is resolved with one probe of the
+    precomputed mask table rather than a per-root search.
+    """
+    rows = hands if hasattr(hands, "__getitem__") and hasattr(hands, "__len__") else list(hands)
+    index = chord_index()
+    matches = index.matches
+    entries = index.entries
+    result = ChordMatches(index, rows)
+    for row in rows:
+        found = _match_row(row, matches)
+        if found is None:
+            result.type_ids.append(-1)
+            result.quality_ids.append(-1)
+            result.roots.append(-1)
+        else:
+            root_pc, entry_id = found
+            entry = entries[entry_id]
+            result.type_ids.append(entry.type_id)
+            result.quality_ids.append(entry.quality_id)
+            result.roots.append(root_pc)
+    return result
@@ -0,0 +1,252 @@
+"""Chord index module.
+
+Flattens the chord database into 12-bit interval masks so identifying a
+chord is a table probe per candidate root instead of a scan of every entry.
+The same tables can be compiled into a flat binary file and memory-mapped,
+so worker processes share one read-only copy instead of parsing the JSON.
+"""
+import hashlib
+import json
+import mmap
+import struct
+from array import array
+from collections import namedtuple
+from models import Pitch
+
+# Bit n of a mask is set when pitch class n (relative to the root) is present.
+# ``tones`` lists the same intervals in chord order (root, 3rd, 5th, 7th, ...).
+ChordEntry = namedtuple("ChordEntry", ["chord_type", "quality", "type_id", "quality_id", "mask", "size", "tones"])
+
+
+def pc_mask(pcs):
+    """Fold an iterable of pitch classes into a 12-bit mask."""
+    mask = 0
+    for pc in pcs:
+        mask |= 1 << pc
+    return mask
+
+
+def rotate_mask(mask: int, pc: int) -> int:
+    """Re-express a pitch-class mask relative to ``pc`` (``pc`` becomes bit 0)."""
+    return ((mask >> pc) | (mask << (12 - pc))) & 0xFFF
+
+
+class ChordIndex:
+    """Interval-mask index over a ``chords_by_type`` style database.
+
+    Entries keep the order in which ``find_chord`` used to walk the database
+    (type -> root -> quality), so the first entry with a given mask is the one
+    the old linear scan would have returned.
+    """
+
+    def __init__(self, db: dict):
+        self.types = []
+        self.qualities = []
+        self.entries = []
+        self.lookup = [-1] * 4096  # interval mask -> first entry id
+        self._matches = None
+
+        seen = set()
+        for chord_type, roots in db.items():
+            if chord_type not in self.types:
+                self.types.append(chord_type)
+            type_id = self.types.index(chord_type)
+            for qualities in roots.values():
+                for quality, data in qualities.items():
+                    mask = pc_mask(pc % 12 for pc in data["semitones"])
+                    if (chord_type, quality, mask) in seen:
+                        continue
+                    seen.add((chord_type, quality, mask))
+                    if quality not in self.qualities:
+                        self.qualities.append(quality)
+                    notes = [Pitch.wheel[name] for name in data["notes"]]
+                    tones = tuple((pc - notes[0]) % 12 for pc in notes)
+                    entry = ChordEntry(chord_type, quality, type_id, self.qualities.index(quality),
+                                       mask, len(data["semitones"]), tones)
+                    if self.lookup[mask] < 0:
+                        self.lookup[mask] = len(self.entries)
+                    self.entries.append(entry)
+
+    def match(self, mask: int, root_pc: int):
+        """Return the entry whose intervals equal ``mask`` heard from ``root_pc``, or None."""
+        entry_id = self.lookup[rotate_mask(mask, root_pc)]
+        return self.entries[entry_id] if entry_id >= 0 else None
+
+    @property
+    def matches(self):
+        """Pitch-class mask -> tuple of (root_pc, entry_id) for every root that forms a chord.
+
+        Built on first use; roots are listed in ascending pitch-class order.
+        """
+        if self._matches is None:
+            table = []
+            for mask in range(4096):
+                found = []
+                for pc in range(12):
+                    if mask >> pc & 1:
+                        entry_id = self.lookup[rotate_mask(mask, pc)]
+                        if entry_id >= 0:
+                            found.append((pc, entry_id))
+                table.append(tuple(found))
+            self._matches = table
+        return self._matches
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"ChordIndex({len(self.entries)} entries, {len(self.types)} types)"
+
+
+# Binary index layout, all little-endian:
+#   header            magic, version, entry count, root count, match pair count, metadata length
+#   metadata          JSON: {"types": [...], "qualities": [...], "roots": [...], "names": [...],
+#                     "source": sha1 of the chords_by_type.json it was built from, or null}
+#   entries           per entry: type id, quality id, mask, size, tone count, 8 tone bytes
+#   lookup            4096 x int16: interval mask -> first entry id, -1 for none
+#   match offsets     4097 x uint32: set mask m owns pairs offsets[m] .. offsets[m + 1]
+#   match pairs       uint16 (root pc, entry id) pairs
+#   spellings         entries x roots x 8 bytes: note name ids (index into "names"), 255 unused
+# Sections start on 4-byte boundaries.
+BINARY_MAGIC = b"CHIX"
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<4sHHHII")
+_ENTRY = struct.Struct("<BBHBB8s")
+MAX_TONES = 8
+
+
+def _pad(offset):
+    return (offset + 3) & ~3
+
+
+def source_hash(path: str) -> str:
+    """sha1 of a chord database file's bytes; files generated from it record this to detect staleness."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def write_binary_index(db: dict, path: str, source: str = None):
+    """Compile ``db`` (``chords_by_type`` layout) into the binary index at ``path``.
+
+    ``source`` is the :func:`source_hash` of the JSON ``db`` was read from.
+    """
+    index = ChordIndex(db)
+    roots = list(dict.fromkeys(root for by_root in db.values() for root in by_root))
+    names = list(Pitch.wheel)
+    name_ids = {name: i for i, name in enumerate(names)}
+    metadata = json.dumps({"types": index.types, "qualities": index.qualities,
+                           "roots": roots, "names": names, "source": source}, separators=(",", ":")).encode()
+
+    offsets, pairs = [0], []
+    for found in index.matches:
+        for root_pc, entry_id in found:
+            pairs += [root_pc, entry_id]
+        offsets.append(len(pairs) // 2)
+
+    spellings = bytearray(b"\xff" * (len(index.entries) * len(roots) * MAX_TONES))
+    for entry_id, entry in enumerate(index.entries):
+        for r, root in enumerate(roots):
+            data = db[entry.chord_type].get(root, {}).get(entry.quality)
+            if data is None or pc_mask(pc % 12 for pc in data["semitones"]) != entry.mask:
+                continue
+            start = (entry_id * len(roots) + r) * MAX_TONES
+            note_ids = [name_ids[name] for name in data["notes"][:MAX_TONES]]
+            spellings[start:start + len(note_ids)] = bytes(note_ids)
+
+    sections = [
+        metadata,
+        b"".join(_ENTRY.pack(entry.type_id, entry.quality_id, entry.mask, entry.size, len(entry.tones),
+                             bytes(entry.tones[:MAX_TONES])) for entry in index.entries),
+        array("h", index.lookup).tobytes(),
+        array("I", offsets).tobytes(),
+        array("H", pairs).tobytes(),
+        bytes(spellings),
+    ]
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(index.entries), len(roots), len(pairs) // 2, len(metadata))
+    with open(path, "wb") as f:
+        f.write(header)
+        offset = len(header)
+        for section in sections:
+            f.write(b"\0" * (_pad(offset) - offset))
+            offset = _pad(offset)
+            f.write(section)
+            offset += len(section)
+
+
+class _MappedMatches:
+    """``ChordIndex.matches`` read from the mapped file; each set's tuple is decoded on first use."""
+
+    def __init__(self, offsets, pairs):
+        self._offsets = offsets
+        self._pairs = pairs
+        self._decoded = [None] * 4096
+
+    def __getitem__(self, mask):
+        found = self._decoded[mask]
+        if found is None:
+            start, end = self._offsets[mask], self._offsets[mask + 1]
+            flat = self._pairs[2 * start:2 * end]
+            found = self._decoded[mask] = tuple(zip(flat[::2], flat[1::2]))
+        return found
+
+    def __len__(self):
+        return 4096
+
+    def __iter__(self):
+        return (self[mask] for mask in range(4096))
+
+
+class MappedChordIndex(ChordIndex):
+    """A :class:`ChordIndex` served from a binary index file written by :func:`write_binary_index`.
+
+    The file is memory-mapped read-only: ``lookup`` and the match tables are
+    views into the shared page cache, so processes mapping the same file
+    share one copy. Only the entry list and the match tuples actually used
+    are materialized per process.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, n_entries, n_roots, n_pairs, meta_len = _HEADER.unpack_from(view)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Not a version {BINARY_VERSION} chord index: {path}")
+
+        offset = _pad(_HEADER.size)
+        metadata = json.loads(bytes(view[offset:offset + meta_len]))
+        offset = _pad(offset + meta_len)
+        self.types = metadata["types"]
+        self.qualities = metadata["qualities"]
+        self.roots = metadata["roots"]
+        self._names = metadata["names"]
+        self.source = metadata.get("source")
+
+        self.entries = []
+        for entry_id in range(n_entries):
+            type_id, quality_id, mask, size, n_tones, tones = _ENTRY.unpack_from(view, offset + entry_id * _ENTRY.size)
+            self.entries.append(ChordEntry(self.types[type_id], self.qualities[quality_id], type_id, quality_id,
+                                           mask, size, tuple(tones[:n_tones])))
+        offset = _pad(offset + n_entries * _ENTRY.size)
+
+        self.lookup = view[offset:offset + 2 * 4096].cast("h")
+        offset = _pad(offset + 2 * 4096)
+        offsets = view[offset:offset + 4 * 4097].cast("I")
+        offset = _pad(offset + 4 * 4097)
+        pairs = view[offset:offset + 4 * n_pairs].cast("H")
+        offset = _pad(offset + 4 * n_pairs)
+        self._spellings = view[offset:offset + n_entries * n_roots * MAX_TONES]
+        self._root_ids = {root: i for i, root in enumerate(self.roots)}
+        self._matches = _MappedMatches(offsets, pairs)
+
+    def spelled(self, entry_id: int, root: str):
+        """Note names of entry ``entry_id`` built on ``root``, as stored in the database, or None."""
+        r = self._root_ids.get(root)
+        if r is None:
+            return None
+        start = (entry_id * len(self.roots) + r) * MAX_TONES
+        names = [self._names[i] for i in self._spellings[start:start + MAX_TONES] if i != 255]
+        return names or None
+
+    def __repr__(self):
+        return f"MappedChordIndex({len(self.entries)} entries, {len(self.types)} types)"
@@ -1,22 +1,55 @@
 from abc import ABC, abstractmethod
-from models import Pitch, Key, Interval, apply_interval
+from time import perf_counter_ns
+from models import Pitch, Key, Interval, apply_interval, instrumentation
+from models.interval import interval_steps, shift_pitch
 
 
 # === Chord Classes ===
 
 class Chord(ABC):
-    """Abstract base class for all chords."""
+    """Abstract base class for all chords.
+
+    Transposing stores the chord as its root plus each tone's (semitones,
+    letter steps) from the root; ``notes`` and ``key`` are only rebuilt from
+    that when next read. Edit notes through ``add_note``/``remove_note`` or
+    by assigning ``notes`` so those steps stay in sync.
+    """
 
     def __init__(self, root: Pitch = None, quality: str = None, key: Key = None, notes=None):
         if root is None or quality is None:
             raise ValueError("Provide both 'root' and 'quality'.")
+        start = perf_counter_ns() if instrumentation.enabled else 0
         self.root = root
         self.quality = quality
         self.key = key or Key(root.name, "major")
         if notes is None:
             self.notes = self.generate_notes()
+            self._tones = self._quality_tones(quality)
         else:
             self.notes = notes
+        if start:
+            instrumentation.record(f"chord.{type(self).__name__}", perf_counter_ns() - start, f"{root}{quality}")
+
+    @property
+    def notes(self):
+        if self._notes is None:
+            self._notes = [shift_pitch(self.root, semitones, letter_steps) for semitones, letter_steps in self._tones]
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes):
+        self._notes = notes
+        self._tones = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = Key(self.root.name, self._mode)
+        return self._key
+
+    @key.setter
+    def key(self, key):
+        self._key = key
 
     @abstractmethod
     def generate_notes(self):
@@ -26,6 +59,7 @@ class Chord(ABC):
     def add_note(self, note: Pitch):
         if note not in self.notes:
             self.notes.append(note)
+            self._tones = None
 
     def add_notes(self, notes: list):
         for note in notes:
@@ -34,17 +68,66 @@ class Chord(ABC):
     def remove_note(self, note: Pitch):
         if note in self.notes:
             self.notes.remove(note)
+            self._tones = None
 
     def remove_notes(self, notes: list):
         for note in notes:
             self.remove_note(note)
 
+    @classmethod
+    def _quality_tones(cls, quality):
+        # (semitones, letter steps) of the root and each QUALITY_INTERVALS entry, built once per class
+        table = cls.__dict__.get("_tone_table")
+        if table is None:
+            table = {q: ((0, 0),) + tuple(interval_steps[i] for i in intervals)
+                     for q, intervals in getattr(cls, "QUALITY_INTERVALS", {}).items()}
+            cls._tone_table = table
+        return table.get(quality)
+
+    def tones(self):
+        """Each note as (semitones, letter steps) above the root."""
+        if self._tones is not None:
+            return self._tones
+        root = self.root
+        root_letter = Pitch.letter_index[root.letter]
+        tones = []
+        for note in self._notes:
+            if root.octave is None or note.octave is None:
+                semitones = (note.pc - root.pc) % 12
+            else:
+                semitones = note.pc + 12 * note.octave - root.pc - 12 * root.octave
+            tones.append((semitones, (Pitch.letter_index[note.letter] - root_letter) % 7))
+        self._tones = tuple(tones)
+        return self._tones
+
+    @property
+    def pcs(self):
+        """Pitch classes of the notes, without spelling them."""
+        if self._notes is not None:
+            return [note.pc for note in self._notes]
+        return [(self.root.pc + semitones) % 12 for semitones, _ in self._tones]
+
+    def _move(self, target, steps):
+        # Shift ``target`` to this chord moved by ``steps``; notes and key are respelled lazily
+        target._tones = self.tones()
+        target._mode = self._key.mode if self._key is not None else self._mode
+        target.root = shift_pitch(self.root, *steps)
+        target._notes = None
+        target._key = None
+        return target
+
     def transpose(self, interval: str):
         """Transpose the chord by a given interval."""
-        transposed_root = apply_interval(self.root, self.key, interval)
-        self.root = transposed_root
-        self.key = Key(str(transposed_root), self.key.mode)
-        self.notes = self.generate_notes()
+        return self._move(self, _interval_steps(interval))
+
+    def transposed(self, interval: str):
+        """Return a transposed copy, leaving this chord unchanged."""
+        return self._move(self._copy(), _interval_steps(interval))
+
+    def _copy(self):
+        chord = object.__new__(type(self))
+        chord.__dict__.update(self.__dict__)
+        return chord
 
     def __repr__(self):
         return f"{self.root}{self.quality}: {'-'.join(str(n) for n in self.notes)}"
@@ -107,6 +190,37 @@ class NinthChord(Chord):
         return [self.root] + [apply_interval(self.root, self.key, intv) for intv in self.QUALITY_INTERVALS[self.quality]]
 
 
+class EleventhChord(Chord):
+    """6-note eleventh chords (root, 3rd, 5th, 7th, 9th, 11th)."""
+
+    QUALITY_INTERVALS = {
+        "dominant11": ["M3", "P5", "m7", "M9", "P11"],
+        "minor11":    ["m3", "P5", "m7", "M9", "P11"],
+        "major11":    ["M3", "P5", "M7", "M9", "P11"],
+        "dominant#11": ["M3", "P5", "m7", "M9", "A11"]
+    }
+
+    def generate_notes(self):
+        if self.quality not in self.QUALITY_INTERVALS:
+            raise ValueError(f"Unsupported 11th chord quality: {self.quality}")
+        return [self.root] + [apply_interval(self.root, self.key, intv) for intv in self.QUALITY_INTERVALS[self.quality]]
+
+
+class ThirteenthChord(Chord):
+    """Thirteenth chords voiced without the 11th (root, 3rd, 5th, 7th, 9th, 13th)."""
+
+    QUALITY_INTERVALS = {
+        "dominant13": ["M3", "P5", "m7", "M9", "M13"],
+        "minor13":    ["m3", "P5", "m7", "M9", "M13"],
+        "major13":    ["M3", "P5", "M7", "M9", "M13"]
+    }
+
+    def generate_notes(self):
+        if self.quality not in self.QUALITY_INTERVALS:
+            raise ValueError(f"Unsupported 13th chord quality: {self.quality}")
+        return [self.root] + [apply_interval(self.root, self.key, intv) for intv in self.QUALITY_INTERVALS[self.quality]]
+
+
 class GenericChord(Chord):
     """Fallback chord class for custom note lists without standard quality/type."""
 
@@ -117,7 +231,7 @@ class GenericChord(Chord):
         self.notes = notes
         self.root = notes[0]
         self.quality = "custom"
-        self.key = key or Key(str(self.root), "major")
+        self.key = key or Key(self.root.name, "major")
 
     def generate_notes(self):
         return self.notes
@@ -126,3 +240,17 @@ class GenericChord(Chord):
         return f"{self.root}(custom): {'-'.join(str(n) for n in self.notes)}"
 
 
+# === Transposition ===
+
+def _interval_steps(interval: str):
+    steps = interval_steps.get(interval)
+    if steps is None:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return steps
+
+
+def transpose_all(chords, interval: str):
+    """Return transposed copies of ``chords``; the interval is parsed once and no notes are spelled."""
+    steps = _interval_steps(interval)
+    return [chord._move(chord._copy(), steps) for chord in chords]
+
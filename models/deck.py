@@ -1 +1,101 @@
 """Deck module."""
+import random
+from array import array
+from models import Pitch
+
+# A card is one unsigned int:
+#   bits 0-5   index into CARD_NAMES (the spelled pitch name)
+#   bits 6-9   octave + 2, or 0 when the card has no octave
+#   bits 10-31 card modifier flags
+CARD_NAMES = list(Pitch.wheel)
+_NAME_CODES = {name: i for i, name in enumerate(CARD_NAMES)}
+_NAME_PCS = [Pitch.wheel[name] for name in CARD_NAMES]
+NAME_BITS = 6
+OCTAVE_BITS = 4
+MODIFIER_SHIFT = NAME_BITS + OCTAVE_BITS
+
+
+def encode_card(pitch: Pitch, modifiers: int = 0) -> int:
+    octave = 0 if pitch.octave is None else pitch.octave + 2
+    if pitch.octave is not None and not 1 <= octave < 1 << OCTAVE_BITS:
+        raise ValueError(f"Octave out of range for a card: {pitch.octave}")
+    return _NAME_CODES[pitch.name] | octave << NAME_BITS | modifiers << MODIFIER_SHIFT
+
+
+def card_pitch(card: int) -> Pitch:
+    octave = card >> NAME_BITS & 0xF
+    return Pitch(CARD_NAMES[card & 0x3F], None if octave == 0 else octave - 2)
+
+
+def card_pc(card: int) -> int:
+    return _NAME_PCS[card & 0x3F]
+
+
+def card_modifiers(card: int) -> int:
+    return card >> MODIFIER_SHIFT
+
+
+def hand_mask(cards) -> int:
+    """Pitch-class mask of a run of cards, for the chord index."""
+    mask = 0
+    for card in cards:
+        mask |= 1 << _NAME_PCS[card & 0x3F]
+    return mask
+
+
+class Deck:
+    """Cards packed into an ``array('I')``, drawn from the end.
+
+    Cards stay integers until read through ``deck[i]`` or :func:`card_pitch`,
+    so a deck costs four bytes per card rather than a Pitch object each.
+    """
+
+    default_octaves = (3, 4, 5, 6)
+    _standard = {}  # octaves -> encoded standard deck, built once
+
+    def __init__(self, cards=None, seed=None):
+        self.cards = self.standard_cards()[:] if cards is None else array("I", cards)
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def standard_cards(cls, octaves=None):
+        """One card per pitch class (default spelling) in each octave, as a shared array."""
+        octaves = tuple(octaves or cls.default_octaves)
+        cards = cls._standard.get(octaves)
+        if cards is None:
+            cards = cls._standard[octaves] = array("I", [encode_card(Pitch(name, octave))
+                                                        for octave in octaves for name in Pitch.default_names])
+        return cards
+
+    def shuffle(self, seed=None):
+        """Shuffle in place; passing ``seed`` makes the order reproducible."""
+        if seed is not None:
+            self.rng.seed(seed)
+        self.rng.shuffle(self.cards)
+
+    def draw(self) -> int:
+        """Remove and return the top card; raises IndexError when the deck is empty."""
+        return self.cards.pop()
+
+    def deal(self, n_players: int, hand_size: int):
+        """Deal ``hand_size`` cards to each player from the top of the deck.
+
+        Returns one memoryview per player over a single array of the dealt
+        cards, so no per-card objects are created.
+        """
+        count = n_players * hand_size
+        if count > len(self.cards):
+            raise ValueError(f"Cannot deal {count} cards from a deck of {len(self.cards)}")
+        dealt = self.cards[len(self.cards) - count:]
+        del self.cards[len(self.cards) - count:]
+        view = memoryview(dealt)
+        return [view[i * hand_size:(i + 1) * hand_size] for i in range(n_players)]
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __getitem__(self, i) -> Pitch:
+        return card_pitch(self.cards[i])
+
+    def __repr__(self):
+        return f"Deck({len(self.cards)} cards)"
@@ -1 +1,75 @@
 """Game module."""
+import os
+import random
+from models.chord_finder import chord_index
+from models.round import Round, Tally
+
+
+# Compiled scoring table, sent once per worker process rather than with every chunk
+_worker_table = None
+
+
+def _init_worker(table=None):
+    global _worker_table
+    _worker_table = table
+    # Build the chord index (and its mask table) once per worker process
+    chord_index().matches
+
+
+def _play_rounds(seed, start, count, n_players, hand_size, table=None):
+    """Play rounds ``start .. start + count``; each round seeds from (seed, round number).
+
+    Without ``table``, rounds score with the table installed by :func:`_init_worker`.
+    """
+    if table is None:
+        table = _worker_table
+    tally = Tally()
+    for number in range(start, start + count):
+        Round(Game.round_seed(seed, number), n_players, hand_size, table=table).play(tally)
+    return tally
+
+
+class Game:
+    """Headless Monte Carlo driver playing many seeded rounds.
+
+    Round ``n`` always uses the seed derived from ``(seed, n)``, so results are
+    the same whatever the worker count or chunking.
+    """
+
+    def __init__(self, seed=0, n_players=4, hand_size=4, modifiers=None, key=None):
+        self.seed = seed
+        self.n_players = n_players
+        self.hand_size = hand_size
+        self.modifiers = modifiers
+        self.key = key
+
+    @staticmethod
+    def round_seed(seed, number):
+        return random.Random(f"{seed}:{number}").getrandbits(64)
+
+    def simulate(self, n_rounds: int, workers: int = None, chunk_size: int = 2000) -> Tally:
+        """Play ``n_rounds`` rounds and return the merged tally.
+
+        ``workers=1`` plays in-process; otherwise rounds are split into chunks
+        across a ProcessPoolExecutor (default: one worker per CPU).
+        """
+        workers = workers or os.cpu_count() or 1
+        # Workers get the compiled table, plain lists, never the modifiers and their predicates
+        table = self.modifiers.compile(Round.base_scores, self.key) if self.modifiers else None
+        chunks = [(self.seed, start, min(chunk_size, n_rounds - start), self.n_players, self.hand_size)
+                  for start in range(0, n_rounds, chunk_size)]
+        if workers == 1 or len(chunks) <= 1:
+            return sum_tallies(_play_rounds(*chunk, table=table) for chunk in chunks)
+
+        # Imported here: multiprocessing is only needed when simulating across processes
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(table,)) as pool:
+            return sum_tallies(pool.map(_play_rounds, *zip(*chunks)))
+
+
+def sum_tallies(tallies) -> Tally:
+    total = Tally()
+    for tally in tallies:
+        total.merge(tally)
+    return total
@@ -1 +1,99 @@
 """Hand module."""
+from models import Pitch, GenericChord
+from models.chord_finder import chord_index, _build_chord
+
+
+class Hand:
+    """The cards a player holds, with the chord they form kept up to date.
+
+    The hand tracks a pitch-class mask and per-class counts, so adding,
+    removing or swapping one card re-identifies the chord with a single probe
+    of the chord index rather than a fresh ``find_chord`` search. Results
+    agree with ``find_chord``: doubled pitch classes never form a chord, and
+    when several notes could be the root the earliest card wins.
+    """
+
+    def __init__(self, cards=None):
+        self.cards = []
+        self.counts = [0] * 12
+        self.mask = 0
+        self._doubled = 0  # pitch classes held more than once
+        self._match = None  # (root_pc, entry_id)
+        self._chord = None
+        for card in cards or ():
+            self._add(card)
+        self._identify()
+
+    def _add(self, card: Pitch):
+        self.cards.append(card)
+        count = self.counts[card.pc] = self.counts[card.pc] + 1
+        if count == 1:
+            self.mask |= 1 << card.pc
+        elif count == 2:
+            self._doubled += 1
+
+    def _remove(self, card: Pitch):
+        self.cards.remove(card)
+        count = self.counts[card.pc] = self.counts[card.pc] - 1
+        if count == 0:
+            self.mask &= ~(1 << card.pc)
+        elif count == 1:
+            self._doubled -= 1
+
+    def _identify(self):
+        self._chord = None
+        found = () if self._doubled else chord_index().matches[self.mask]
+        if len(found) <= 1:
+            self._match = found[0] if found else None
+            return
+        # Symmetric chords (augmented, diminished7): the first card that is a root wins
+        by_root = dict(found)
+        self._match = next((card.pc, by_root[card.pc]) for card in self.cards if card.pc in by_root)
+
+    def add(self, card: Pitch):
+        self._add(card)
+        self._identify()
+
+    def remove(self, card: Pitch):
+        """Remove the first card equal to ``card``; raises ValueError if absent."""
+        self._remove(card)
+        self._identify()
+
+    def swap(self, old: Pitch, new: Pitch):
+        """Replace ``old`` with ``new`` and re-identify once."""
+        self._remove(old)
+        self._add(new)
+        self._identify()
+
+    @property
+    def match(self):
+        """Return (chord_type, quality, root_pc) for the hand, or None."""
+        if self._match is None:
+            return None
+        root_pc, entry_id = self._match
+        entry = chord_index().entries[entry_id]
+        return entry.chord_type, entry.quality, root_pc
+
+    @property
+    def chord(self):
+        """The chord object ``find_chord`` would return, built on first access after a change."""
+        if self._chord is None and self.cards:
+            if self._match is None:
+                self._chord = GenericChord(list(self.cards))
+            else:
+                root_pc, entry_id = self._match
+                root = next(card for card in self.cards if card.pc == root_pc)
+                self._chord = _build_chord(root, chord_index().entries[entry_id])
+        return self._chord
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __contains__(self, card):
+        return card in self.cards
+
+    def __repr__(self):
+        return f"Hand({' '.join(str(card) for card in self.cards)})"
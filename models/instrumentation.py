@@ -0,0 +1,128 @@
+"""Instrumentation module.
+
+Opt-in counters and timing histograms for the hot paths (``find_chord``,
+``rank_chords``, ``apply_interval``, Key and Chord construction). Disabled,
+each instrumented call pays one attribute check: hot paths only read the
+clock when ``enabled`` is set, and report through :func:`record` and
+:func:`count`. Turn it on with :func:`enable`, or for a block or function
+with :class:`sampling`, and read the results with :func:`snapshot`.
+"""
+import threading
+from collections import Counter
+from contextlib import ContextDecorator
+
+enabled = False
+
+_lock = threading.Lock()
+_depth = 0  # nested sampling blocks
+counters = Counter()
+timings = {}
+
+
+class Histogram:
+    """Durations in nanoseconds, bucketed by powers of two.
+
+    ``slowest`` keeps the sample (for example the hand's note names) that
+    produced the longest duration, so spikes can be traced to their input.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.slowest = None
+        self.buckets = Counter()
+
+    def add(self, ns, sample=None):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns >= self.max:
+            self.max, self.slowest = ns, sample
+        self.buckets[1 << max(ns, 1).bit_length()] += 1
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "mean_ns": self.total / self.count if self.count else 0.0,
+            "min_ns": self.min,
+            "max_ns": self.max,
+            "slowest": self.slowest,
+            # Upper bound (exclusive, in ns) -> calls
+            "buckets": dict(sorted(self.buckets.items())),
+        }
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        counters.clear()
+        timings.clear()
+
+
+def count(name, n=1):
+    with _lock:
+        counters[name] += n
+
+
+def record(name, ns, sample=None):
+    """Add one duration to the histogram ``name``."""
+    with _lock:
+        histogram = timings.get(name)
+        if histogram is None:
+            histogram = timings[name] = Histogram()
+        histogram.add(ns, sample)
+
+
+class sampling(ContextDecorator):
+    """Enable instrumentation inside a ``with`` block or a decorated function.
+
+    Blocks nest; instrumentation turns off again when the outermost one
+    exits, unless it was already enabled globally. ``reset=True`` clears
+    earlier results on entry.
+    """
+
+    def __init__(self, reset=False):
+        self.reset = reset
+        self._was_enabled = False
+
+    def __enter__(self):
+        global _depth, enabled
+        with _lock:
+            if _depth == 0:
+                self._was_enabled = enabled
+            _depth += 1
+            enabled = True
+        if self.reset:
+            reset()
+        return self
+
+    def __exit__(self, *exc):
+        global _depth, enabled
+        with _lock:
+            _depth -= 1
+            if _depth == 0 and not self._was_enabled:
+                enabled = False
+        return False
+
+
+def snapshot() -> dict:
+    """Return a plain-dict copy of every counter and histogram."""
+    with _lock:
+        return {
+            "enabled": enabled,
+            "counters": dict(counters),
+            "timings": {name: histogram.as_dict() for name, histogram in sorted(timings.items())},
+        }
@@ -1,5 +1,7 @@
 """Interval module."""
-from models import Pitch
+from array import array
+from time import perf_counter_ns
+from models import Pitch, instrumentation
 
 class Interval:
     qualities = {  # semitone, note letters
@@ -42,8 +44,8 @@ class Interval:
         self.semitones = (self.high.pc + 12 * (self.high.octave or 0)) - (self.low.pc + 12 * (self.low.octave or 0))
 
         # Calculate letter steps correctly
-        low_letter_idx = Pitch.letters.index(self.low.letter)
-        high_letter_idx = Pitch.letters.index(self.high.letter)
+        low_letter_idx = Pitch.letter_index[self.low.letter]
+        high_letter_idx = Pitch.letter_index[self.high.letter]
 
         # Calculate positive letter steps
         if high_letter_idx >= low_letter_idx:
@@ -92,6 +94,11 @@ class Interval:
         else:
             raise TypeError(f"Unsupported type for subtraction: {type(other)}")
 
+    @classmethod
+    def from_arrays(cls, lows, highs):
+        """Compute many intervals at once as an IntervalArray of integer codes."""
+        return intervals_from_arrays(lows, highs)
+
     def compliment(self):
         comp_semitones = 12 - (self.semitones % 12)
         comp_letter_steps = (7 - self.letter_steps % 7) % 7
@@ -121,18 +128,33 @@ interval_semitones = {
     "M14": 23, "P15": 24,
 }
 
+# Interval name -> (semitones, letter steps), parsed once (e.g. "M3" -> (4, 2))
+interval_steps = {name: (semitones, (int(''.join(filter(str.isdigit, name))) - 1) % 7)
+                  for name, semitones in interval_semitones.items()}
+
+# (pitch class, letter) -> spelled name; the first wheel entry wins
+spellings = {(pc, name[0]): name for name, pc in reversed(Pitch.wheel.items())}
+
+
+def shift_pitch(pitch: Pitch, semitones: int, letter_steps: int) -> Pitch:
+    """Move ``pitch`` up by ``semitones``, spelled on the letter ``letter_steps`` above its own."""
+    letter = Pitch.letters[(Pitch.letter_index[pitch.letter] + letter_steps) % 7]
+    pc = (pitch.pc + semitones) % 12
+    name = spellings.get((pc, letter))
+    if name is None:
+        raise ValueError(f"Can't find spelling for pitch class {pc} and letter {letter}")
+    return Pitch(name, None if pitch.octave is None else (pitch.pc + pitch.octave * 12 + semitones) // 12)
+
+
 def apply_interval(pitch: Pitch, key, interval_str: str) -> Pitch:
-    semitones = interval_semitones.get(interval_str)
-    if semitones is None:
+    start = perf_counter_ns() if instrumentation.enabled else 0
+    steps = interval_steps.get(interval_str)
+    if steps is None:
         raise ValueError(f"Unsupported interval: {interval_str}")
-
-    # Determine letter steps from interval string (e.g., M2 = 1 step, M3 = 2 steps...)
-    interval_number = int(''.join(filter(str.isdigit, interval_str)))
-    letter_steps = (interval_number - 1) % 7
+    semitones, letter_steps = steps
 
     # New letter after applying interval
-    start_letter_index = Pitch.letters.index(pitch.letter)
-    new_letter_index = (start_letter_index + letter_steps) % 7
+    new_letter_index = (Pitch.letter_index[pitch.letter] + letter_steps) % 7
     new_letter = Pitch.letters[new_letter_index]
 
     # New pitch class
@@ -148,6 +170,119 @@ def apply_interval(pitch: Pitch, key, interval_str: str) -> Pitch:
 
     # Use key to get correct spelling
     note_name = key.find_spelling(new_pc, new_letter)
-    return Pitch(note_name, None if new_octave is None else new_octave)
+    result = Pitch(note_name, None if new_octave is None else new_octave)
+    if start:
+        instrumentation.record("apply_interval", perf_counter_ns() - start, interval_str)
+    return result
+
+
+
+# Interval names as compact integer codes, and (semitones, letter steps) -> code
+interval_names = list(dict.fromkeys(Interval.qualities.values()))
+_quality_codes = {key: interval_names.index(name) for key, name in Interval.qualities.items()}
+_A7 = interval_names.index("A7")
+
+
+def _pitch_fields(pitch: Pitch):
+    octave = pitch.octave or 0
+    return (pitch.pc + 12 * octave, octave, pitch.pc, Pitch.letter_index[pitch.letter],
+            pitch.name == "B#", pitch.octave)
+
+
+def _interval_fields(a, b):
+    """(semitones, letter_steps, code) for ``Interval(a, b)`` from precomputed pitch fields."""
+    if b[1] > a[1] or (b[1] == a[1] and b[2] >= a[2]):
+        low, high = a, b
+    else:
+        low, high = b, a
+    semitones = high[0] - low[0]
+    letter_steps = (high[3] - low[3]) % 7
+    if high[4] and high[1] > low[1] and semitones == 12 and letter_steps == 6:
+        return semitones, letter_steps, _A7
+    if high[5] or low[5] is not None:
+        return semitones, letter_steps, _quality_codes.get((semitones, letter_steps), -1)
+    return semitones, letter_steps, _quality_codes.get((semitones % 12, letter_steps), -1)
+
+
+class IntervalArray:
+    """Many intervals held as parallel ``array('h')`` columns instead of Interval objects.
+
+    ``codes`` index ``interval_names`` (-1 when the interval has no name);
+    names are only decoded on request. ``shape`` is ``(n,)`` for paired
+    arrays or ``(n, n)`` for a row-major pairwise matrix.
+    """
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.semitones = array("h")
+        self.letter_steps = array("h")
+        self.codes = array("h")
+
+    def _append(self, fields):
+        semitones, letter_steps, code = fields
+        self.semitones.append(semitones)
+        self.letter_steps.append(letter_steps)
+        self.codes.append(code)
+
+    def _flat(self, i):
+        if isinstance(i, tuple):
+            row, col = i
+            return row * self.shape[1] + col
+        return i
+
+    def name(self, i):
+        """Decode one interval name; ``i`` is a flat index or a (row, col) pair."""
+        k = self._flat(i)
+        code = self.codes[k]
+        return interval_names[code] if code >= 0 else f"{self.semitones[k]} semitones"
+
+    def names(self):
+        return [self.name(k) for k in range(len(self.codes))]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return f"IntervalArray(shape={self.shape})"
+
+
+def intervals_matrix(pitches) -> IntervalArray:
+    """All pairwise intervals: entry (i, j) matches ``Interval(pitches[i], pitches[j])``."""
+    fields = [_pitch_fields(p) for p in pitches]
+    result = IntervalArray((len(fields), len(fields)))
+    semitones_out, steps_out, codes_out = result.semitones, result.letter_steps, result.codes
+    codes = _quality_codes
+    # Same rules as _interval_fields, inlined for the n * n inner loop
+    for a in fields:
+        a_abs, a_oct, a_pc, a_letter, _, a_octave = a
+        for b in fields:
+            b_abs, b_oct, b_pc, b_letter, b_sharp, b_octave = b
+            if b_oct > a_oct or (b_oct == a_oct and b_pc >= a_pc):
+                semitones = b_abs - a_abs
+                letter_steps = (b_letter - a_letter) % 7
+                high_sharp, high_up, high_octave, low_octave = b_sharp, b_oct > a_oct, b_octave, a_octave
+            else:
+                semitones = a_abs - b_abs
+                letter_steps = (a_letter - b_letter) % 7
+                high_sharp, high_up, high_octave, low_octave = a[4], a_oct > b_oct, a_octave, b_octave
+            if high_sharp and high_up and semitones == 12 and letter_steps == 6:
+                code = _A7
+            elif high_octave or low_octave is not None:
+                code = codes.get((semitones, letter_steps), -1)
+            else:
+                code = codes.get((semitones % 12, letter_steps), -1)
+            semitones_out.append(semitones)
+            steps_out.append(letter_steps)
+            codes_out.append(code)
+    return result
+
 
+def intervals_from_arrays(lows, highs) -> IntervalArray:
+    """Element-wise intervals: entry k matches ``Interval(lows[k], highs[k])``."""
+    if len(lows) != len(highs):
+        raise ValueError("lows and highs must be the same length")
+    result = IntervalArray((len(lows),))
+    for low, high in zip(lows, highs):
+        result._append(_interval_fields(_pitch_fields(low), _pitch_fields(high)))
+    return result
 
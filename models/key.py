@@ -1,6 +1,17 @@
-from models import Pitch
+import heapq
+import threading
+from collections import OrderedDict
+from time import perf_counter_ns
+from models import Pitch, instrumentation
+from models.interval import spellings as _spellings
 
 class Key:
+    """A tonic and mode with its generated scale.
+
+    Keys are cached: ``Key("C", "major") is Key("C", "major")``. Instances are
+    shared, so they are immutable and their ``scale`` list must be treated as
+    read-only. ``Key.cache_info()`` reports hits, misses and size.
+    """
     # Semitone patterns for each mode
     mode_patterns = {
         "major":      [2, 2, 1, 2, 2, 2, 1],  # Ionian
@@ -33,13 +44,140 @@ class Key:
         "Eb": "D#", "D##": "E"
     }
 
-    def __init__(self, tonic: str, mode: str = "major"):
-        self.original_tonic = tonic
-        self.mode = mode.lower()
+    # (pitch class, letter) -> spelled name; the first wheel entry wins
+    spellings = _spellings
+
+    # Bounded LRU of shared instances keyed on (tonic, mode); 35 spellings x 17 modes fit
+    cache_maxsize = 1024
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+
+    def __new__(cls, tonic: str, mode: str = "major"):
+        cache_key = (tonic, mode.lower())
+        with cls._cache_lock:
+            key = cls._cache.get(cache_key)
+            if key is not None:
+                cls._cache.move_to_end(cache_key)
+                Key._cache_hits += 1
+                return key
+            Key._cache_misses += 1
+
+        start = perf_counter_ns() if instrumentation.enabled else 0
+        key = super().__new__(cls)
+        key._build(tonic, mode)
+        if start:
+            instrumentation.record("key.build", perf_counter_ns() - start, f"{tonic} {mode}")
+        with cls._cache_lock:
+            key = cls._cache.setdefault(cache_key, key)
+            while len(cls._cache) > cls.cache_maxsize:
+                cls._cache.popitem(last=False)
+        return key
+
+    def _build(self, tonic, mode):
+        init = object.__setattr__
+        init(self, "original_tonic", tonic)
+        init(self, "mode", mode.lower())
         if self.mode not in self.mode_patterns:
             raise ValueError(f"Unsupported mode: {mode}")
-        self.tonic = self.normalize_tonic(tonic)
-        self.scale = self.generate_scale()
+        init(self, "tonic", self.normalize_tonic(tonic))
+        init(self, "scale", self.generate_scale())
+        # Precomputed lookups over the scale
+        init(self, "pc_set", frozenset(p.pc for p in self.scale))
+        init(self, "pc_mask", sum(1 << pc for pc in self.pc_set))
+        degrees = {}
+        for i, p in enumerate(self.scale[:-1]):  # the last note repeats the tonic
+            degrees.setdefault(p.pc, i + 1)
+        init(self, "degrees", degrees)
+
+    @classmethod
+    def cache_info(cls):
+        """Return cache counters as a dict: hits, misses, size and maxsize."""
+        with cls._cache_lock:
+            return {"hits": Key._cache_hits, "misses": Key._cache_misses,
+                    "size": len(cls._cache), "maxsize": cls.cache_maxsize}
+
+    @classmethod
+    def cache_clear(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+            Key._cache_hits = Key._cache_misses = 0
+
+    # Key detection: one profile row per buildable (tonic, mode), stored column-wise by pitch class
+    _candidates = None
+    _profile_columns = None
+
+    @classmethod
+    def _profiles(cls):
+        if cls._candidates is None:
+            candidates, rows = [], []
+            for mode, steps in cls.mode_patterns.items():
+                for tonic_pc, tonic in enumerate(Pitch.default_names):
+                    try:
+                        key = cls(tonic, mode)
+                    except ValueError:
+                        continue  # no spelling for this tonic in this mode
+                    size = len(key.pc_set)
+                    # Mean-centred membership (scaled by 12 to stay integral) so large
+                    # scales gain nothing from containing everything, plus tonic and fifth weight
+                    row = [(12 if pc in key.pc_set else 0) - size for pc in range(12)]
+                    row[tonic_pc] += 12
+                    if (tonic_pc + 7) % 12 in key.pc_set:
+                        row[(tonic_pc + 7) % 12] += 6
+                    candidates.append(key)
+                    rows.append(row)
+            cls._profile_columns = [[row[pc] for row in rows] for pc in range(12)]
+            cls._candidates = candidates
+        return cls._candidates, cls._profile_columns
+
+    @classmethod
+    def rank_histogram(cls, histogram, top=5, modes=None):
+        """Rank keys for a 12-bin pitch-class histogram; returns [(Key, score), ...] best first.
+
+        Scores are the profile matrix times the histogram, accumulated one
+        column per sounding pitch class. Ties keep tonic and ``mode_patterns``
+        order. ``top=None`` returns every candidate; ``modes`` restricts the search.
+        """
+        candidates, columns = cls._profiles()
+        scores = [0] * len(candidates)
+        for pc, weight in enumerate(histogram):
+            if weight:
+                scores = [score + weight * value for score, value in zip(scores, columns[pc])]
+        indices = range(len(candidates))
+        if modes is not None:
+            indices = [i for i in indices if candidates[i].mode in modes]
+        if top is None:
+            order = sorted(indices, key=scores.__getitem__, reverse=True)
+        else:
+            order = heapq.nlargest(top, indices, key=scores.__getitem__)
+        return [(candidates[i], scores[i]) for i in order]
+
+    @classmethod
+    def detect(cls, notes, top=5, modes=None):
+        """Rank the keys that best fit ``notes``; see :meth:`rank_histogram`."""
+        histogram = [0] * 12
+        for note in notes:
+            histogram[note.pc] += 1
+        return cls.rank_histogram(histogram, top, modes)
+
+    @classmethod
+    def detect_batch(cls, groups, top=1, modes=None):
+        """Run :meth:`detect` over many note collections."""
+        return [cls.detect(notes, top, modes) for notes in groups]
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Key is immutable; cannot set {name!r}")
+
+    def __reduce__(self):
+        return Key, (self.original_tonic, self.mode)
+
+    def degree(self, pitch: Pitch):
+        """Return the 1-based scale degree of ``pitch``, or None if it is not in the key."""
+        return self.degrees.get(pitch.pc)
+
+    def __contains__(self, pitch: Pitch):
+        return pitch.pc in self.pc_set
 
     def normalize_tonic(self, tonic: str):
         """Use enharmonic spelling preferred for common keys (e.g., Gb → F#)."""
@@ -51,7 +189,7 @@ class Key:
         steps = self.mode_patterns[self.mode]
         scale = [Pitch(self.tonic)]
         current_pc = scale[0].pc
-        current_letter_index = Pitch.letters.index(self.tonic[0])
+        current_letter_index = Pitch.letter_index[self.tonic[0]]
 
         for step in steps:
             current_pc = (current_pc + step) % 12
@@ -62,10 +200,10 @@ class Key:
         return scale
 
     def find_spelling(self, target_pc, letter):
-        for name, pc in Pitch.wheel.items():
-            if pc == target_pc and name[0] == letter:
-                return name
-        raise ValueError(f"Can't find spelling for pitch class {target_pc} and letter {letter}")
+        name = self.spellings.get((target_pc, letter))
+        if name is None:
+            raise ValueError(f"Can't find spelling for pitch class {target_pc} and letter {letter}")
+        return name
 
     def __repr__(self):
         scale_str = " ".join(str(p) for p in self.scale)
@@ -74,4 +212,7 @@ class Key:
     def __eq__(self, other):
         if isinstance(other, Key):
             return self.tonic == other.tonic and self.mode == other.mode
-        return False
\ No newline at end of file
+        return False
+
+    def __hash__(self):
+        return hash((self.tonic, self.mode))
@@ -1 +1,175 @@
-"""Modifier module."""
+"""Modifier module.
+
+Joker-style scoring effects. A :class:`ModifierStack` compiles its modifiers
+into a :class:`ScoringTable` holding the final (chips, mult) of every hand
+state, so scoring a hand is one list index however many modifiers are active.
+"""
+import time
+from collections import namedtuple
+from models.chord_finder import chord_index
+from models.chord_index import rotate_mask
+
+# What a modifier sees: the identified chord (None fields for no chord), the
+# chord's interval mask relative to its root, and the hand's pitch-class mask
+HandContext = namedtuple("HandContext", ["chord_type", "quality", "intervals", "pcs", "root_pc", "key"])
+
+ModifierCost = namedtuple("ModifierCost", ["name", "seconds", "evaluations", "hits"])
+
+# Table slot for a hand that forms no chord; slots 0-11 are the chord root
+NO_CHORD = 12
+SLOTS = 13
+
+
+class Modifier:
+    """A scoring effect applied when every given condition holds.
+
+    Conditions: ``chord_type`` and ``quality`` (a name or a collection of
+    names), ``interval`` (two pitch classes in the hand this many semitones
+    apart), ``in_key`` (every pitch class is in the round's key) and ``when``,
+    any predicate over a :class:`HandContext`. The effect adds ``chips`` and
+    ``mult``, then multiplies mult by ``xmult``.
+    """
+
+    def __init__(self, name, chips=0, mult=0, xmult=1, chord_type=None, quality=None,
+                 interval=None, in_key=False, when=None):
+        self.name = name
+        self.chips = chips
+        self.mult = mult
+        self.xmult = xmult
+        self.chord_types = {chord_type} if isinstance(chord_type, str) else chord_type
+        self.qualities = {quality} if isinstance(quality, str) else quality
+        self.interval = interval
+        self.in_key = in_key
+        self.when = when
+
+    def applies(self, context: HandContext) -> bool:
+        if self.chord_types is not None and context.chord_type not in self.chord_types:
+            return False
+        if self.qualities is not None and context.quality not in self.qualities:
+            return False
+        if self.interval is not None and not context.pcs & rotate_mask(context.pcs, self.interval % 12):
+            return False
+        if self.in_key and (context.key is None or context.pcs & ~context.key.pc_mask):
+            return False
+        return self.when is None or self.when(context)
+
+    def apply(self, chips, mult):
+        return chips + self.chips, (mult + self.mult) * self.xmult
+
+    def __repr__(self):
+        return f"Modifier({self.name!r})"
+
+
+class ScoringTable:
+    """Final (chips, mult) per hand state, indexed by ``pcs * 13 + slot``."""
+
+    def __init__(self, chips, mult):
+        self.chips = chips
+        self.mult = mult
+        self.scores = [c * m for c, m in zip(chips, mult)]
+
+    @staticmethod
+    def index(pcs: int, root_pc: int = None) -> int:
+        return pcs * SLOTS + (NO_CHORD if root_pc is None else root_pc)
+
+    def score(self, pcs: int, root_pc: int = None):
+        return self.scores[pcs * SLOTS + (NO_CHORD if root_pc is None else root_pc)]
+
+    def __reduce__(self):
+        # Only chips and mult cross process boundaries; scores are rebuilt from them
+        return ScoringTable, (self.chips, self.mult)
+
+    def __len__(self):
+        return len(self.scores)
+
+
+class ModifierStack:
+    """An ordered stack of modifiers, compiled into scoring tables on demand.
+
+    Tables are cached per (base scores, key) and dropped whenever the stack
+    changes. ``profile()`` reports the time each modifier cost the last
+    compile and how many hand states it fired on.
+    """
+
+    def __init__(self, modifiers=()):
+        self.modifiers = list(modifiers)
+        self.version = 0
+        self._tables = {}
+        self._costs = []
+
+    def _changed(self):
+        self.version += 1
+        self._tables.clear()
+
+    def add(self, modifier: Modifier):
+        self.modifiers.append(modifier)
+        self._changed()
+
+    def insert(self, position: int, modifier: Modifier):
+        self.modifiers.insert(position, modifier)
+        self._changed()
+
+    def remove(self, modifier: Modifier):
+        self.modifiers.remove(modifier)
+        self._changed()
+
+    def clear(self):
+        self.modifiers.clear()
+        self._changed()
+
+    @staticmethod
+    def _states(key):
+        """Yield (table index, context) for every reachable hand state."""
+        index = chord_index()
+        entries = index.entries
+        for pcs, found in enumerate(index.matches):
+            yield pcs * SLOTS + NO_CHORD, HandContext(None, None, 0, pcs, None, key)
+            for root_pc, entry_id in found:
+                entry = entries[entry_id]
+                yield pcs * SLOTS + root_pc, HandContext(entry.chord_type, entry.quality, entry.mask, pcs, root_pc, key)
+
+    def compile(self, base_scores: dict, key=None) -> ScoringTable:
+        """Return the scoring table for ``base_scores`` ((chips, mult) per chord type) in ``key``."""
+        cache_key = (tuple(sorted(base_scores.items(), key=lambda item: str(item[0]))), key)
+        table = self._tables.get(cache_key)
+        if table is not None:
+            return table
+
+        states = list(self._states(key))
+        size = 4096 * SLOTS
+        chips, mult = [0] * size, [0] * size
+        default = base_scores[None]
+        for i, context in states:
+            chips[i], mult[i] = base_scores.get(context.chord_type, default)
+
+        # One modifier at a time over every state, so each modifier's cost is measured on its own
+        costs = []
+        for modifier in self.modifiers:
+            start = time.perf_counter()
+            hits = 0
+            for i, context in states:
+                if modifier.applies(context):
+                    chips[i], mult[i] = modifier.apply(chips[i], mult[i])
+                    hits += 1
+            costs.append(ModifierCost(modifier.name, time.perf_counter() - start, len(states), hits))
+        self._costs = costs
+
+        table = self._tables[cache_key] = ScoringTable(chips, mult)
+        return table
+
+    def profile(self):
+        """Per-modifier cost of the last compile, most expensive first."""
+        return sorted(self._costs, key=lambda cost: -cost.seconds)
+
+    def __getstate__(self):
+        # Compiled tables are rebuilt on the other side rather than pickled
+        return {"modifiers": self.modifiers, "version": self.version, "_tables": {}, "_costs": []}
+
+    def __len__(self):
+        return len(self.modifiers)
+
+    def __iter__(self):
+        return iter(self.modifiers)
+
+    def __repr__(self):
+        return f"ModifierStack({self.modifiers!r})"
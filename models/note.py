@@ -1,5 +1,20 @@
+_interned = {}  # (name, octave) -> Pitch
+_interned_get = _interned.get  # bound once: the hit path is a single dict lookup
+
+
 class Pitch:
+    """An immutable, interned pitch: ``Pitch("C", 4) is Pitch("C", 4)``.
+
+    Instances are shared per (name, octave), so they are cheap to create in
+    hot loops and safe to use in sets and as dict keys. Hashing follows
+    ``__eq__``, which compares pitch classes (and octaves when both are known).
+    Only the first construction of a (name, octave) builds an instance; the
+    first pass over new pitches therefore costs more than a plain class would.
+    """
+    __slots__ = ("name", "octave", "pc", "letter", "midi")
+
     letters = ['C', 'D', 'E', 'F', 'G', 'A', 'B']
+    letter_index = {'C': 0, 'D': 1, 'E': 2, 'F': 3, 'G': 4, 'A': 5, 'B': 6}
     wheel = {
         'C': 0, 'B#': 0, 'Dbb': 0,
         'C#': 1, 'Db': 1, 'B##': 1,
@@ -14,15 +29,45 @@ class Pitch:
         'A#': 10, 'Bb': 10, 'Cbb': 10,
         'B': 11, 'Cb': 11 , 'A##': 11,
     }
+    # Spelling used when only a pitch class is known
+    default_names = ['C', 'C#', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B']
+
+    _interned = _interned
 
-    def __init__(self, name: str, octave: int = None):
-        if name not in self.wheel:
+    def __new__(cls, name: str, octave: int = None):
+        pitch = _interned_get((name, octave))
+        if pitch is not None:
+            return pitch
+        if name not in cls.wheel:
             raise ValueError(f"Invalid pitch name: {name}")
-        self.name = name
-        self.octave = octave
-        self.pc = self.wheel[name]  # pitch class 0-11
-        self.letter = name[0]
-        self.midi = self._calculate_midi() if octave is not None else None
+        pitch = super().__new__(cls)
+        init = object.__setattr__
+        init(pitch, "name", name)
+        init(pitch, "octave", octave)
+        init(pitch, "pc", cls.wheel[name])  # pitch class 0-11
+        init(pitch, "letter", name[0])
+        init(pitch, "midi", pitch._calculate_midi() if octave is not None else None)
+        return cls._interned.setdefault((name, octave), pitch)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Pitch is immutable; cannot set {name!r}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Pitch is immutable; cannot delete {name!r}")
+
+    def __reduce__(self):
+        return Pitch, (self.name, self.octave)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @classmethod
+    def from_midi(cls, midi: int, name: str = None):
+        """Pitch for a MIDI note number, spelled with ``default_names`` unless ``name`` is given."""
+        return cls(name or cls.default_names[midi % 12], midi // 12 - 1)
 
     def _calculate_midi(self) -> int:
         """Calculate MIDI note number (C4=60, C#4=61, etc.)."""
@@ -35,7 +80,7 @@ class Pitch:
         return abs(self.pc - other.pc + 12 * ((self.octave or 0) - (other.octave or 0)))
 
     def letter_distance(self, other) -> int:
-        return (Pitch.letters.index(other.letter) - Pitch.letters.index(self.letter)) % 7
+        return (Pitch.letter_index[other.letter] - Pitch.letter_index[self.letter]) % 7
 
 
     def __eq__(self, other):
@@ -45,4 +90,7 @@ class Pitch:
             return self.pc == other.pc and self.octave == other.octave
         return False
 
-
+    def __hash__(self):
+        # Pitches without an octave equal every octave of their pitch class,
+        # so only the pitch class can take part in the hash.
+        return hash(self.pc)
@@ -1 +1,73 @@
 """Player module."""
+from models import Hand, Round
+from models.chord_finder import chord_index, _match_row
+from models.deck import card_pc, card_pitch, hand_mask
+
+
+class Player:
+    """One seat at the table: the cards held, the chords played and the running score.
+
+    Cards are held as encoded deck integers. Each play is recorded in
+    ``chords`` as (root pc, type id, quality id), ids into the chord index's
+    ``types`` and ``qualities``, or None for a play that formed no chord.
+    """
+
+    def __init__(self, cards=(), score=0, chords=()):
+        self.cards = list(cards)
+        self.score = score
+        self.chords = list(chords)
+
+    @property
+    def hand(self) -> Hand:
+        """The held cards as a :class:`Hand`, for the chord they currently form."""
+        return Hand([card_pitch(card) for card in self.cards])
+
+    def draw(self, deck, count=1):
+        """Move ``count`` cards from the top of ``deck`` to the hand; a short deck raises before any card moves."""
+        if count > len(deck):
+            raise ValueError(f"Cannot draw {count} cards from a deck of {len(deck)}")
+        for _ in range(count):
+            self.cards.append(deck.draw())
+
+    def _take(self, positions):
+        # Remove and return the cards at ``positions`` (hand indices), in hand order
+        positions = sorted(set(positions))
+        if positions and not 0 <= positions[0] <= positions[-1] < len(self.cards):
+            raise IndexError(f"Card position out of range for a hand of {len(self.cards)}")
+        taken = [self.cards[i] for i in positions]
+        for i in reversed(positions):
+            del self.cards[i]
+        return taken
+
+    def play(self, positions, table=None) -> int:
+        """Play the cards at ``positions`` and return their score.
+
+        ``table`` is a compiled :class:`ScoringTable`; without one the Round
+        base score for the chord type is used.
+        """
+        cards = self._take(positions)
+        index = chord_index()
+        found = _match_row([card_pc(card) for card in cards], index.matches)
+        if found is None:
+            chord, chord_type = None, None
+        else:
+            entry = index.entries[found[1]]
+            chord, chord_type = (found[0], entry.type_id, entry.quality_id), entry.chord_type
+        if table is None:
+            score = Round.score(chord_type)
+        else:
+            score = table.score(hand_mask(cards), None if found is None else found[0])
+        self.chords.append(chord)
+        self.score += score
+        return score
+
+    def discard(self, positions):
+        """Drop the cards at ``positions`` without scoring them; returns the cards."""
+        return self._take(positions)
+
+    def __eq__(self, other):
+        return (isinstance(other, Player) and self.cards == other.cards
+                and self.score == other.score and self.chords == other.chords)
+
+    def __repr__(self):
+        return f"Player({len(self.cards)} cards, score {self.score})"
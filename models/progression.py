@@ -0,0 +1,168 @@
+"""Progression module.
+
+Streams note groups through chord identification and labels each chord
+against a key detected from the notes heard so far.
+"""
+from collections import deque, namedtuple
+from models import Pitch, Key, GenericChord, find_chord
+
+ProgressionStep = namedtuple("ProgressionStep", ["notes", "chord", "key", "numeral", "function", "cadence"])
+
+NUMERALS = ["I", "II", "III", "IV", "V", "VI", "VII"]
+
+# Roman-numeral suffix per quality; case comes from the chord's third
+QUALITY_SUFFIXES = {
+    "major": "", "minor": "", "diminished": "°", "augmented": "+",
+    "suspended2": "sus2", "suspended4": "sus4",
+    "major7": "maj7", "dominant7": "7", "minor7": "7", "diminished7": "°7",
+    "half-diminished7": "ø7", "minor-major7": "maj7", "augmented7": "+7",
+    "major9": "maj9", "dominant9": "9", "minor9": "9", "add9": "add9",
+    "diminished9": "°9", "half-diminished9": "ø9", "minor-major9": "maj9", "augmented9": "+9",
+    "dominant11": "11", "minor11": "11", "major11": "maj11", "dominant#11": "9#11",
+    "dominant13": "13", "minor13": "13", "major13": "maj13",
+}
+
+FUNCTIONS = {1: "tonic", 2: "predominant", 3: "tonic", 4: "predominant", 5: "dominant", 6: "tonic", 7: "dominant"}
+
+# (previous degree, degree) -> cadence
+CADENCES = {
+    (5, 1): "authentic", (7, 1): "authentic",
+    (4, 1): "plagal",
+    (5, 6): "deceptive",
+    (1, 5): "half", (2, 5): "half", (4, 5): "half", (6, 5): "half",
+}
+
+
+def parse_pitch(token: str) -> Pitch:
+    """Parse ``C``, ``Eb4`` or ``F#-1`` into a Pitch."""
+    name = token.rstrip("-0123456789")
+    octave = token[len(name):]
+    return Pitch(name, int(octave) if octave else None)
+
+
+def read_note_groups(source):
+    """Yield note groups from a text file (path or open file) or any iterable of lines.
+
+    Each non-empty line is one group of whitespace-separated pitches; text
+    after ``#`` is ignored. Lines are read lazily.
+    """
+    if isinstance(source, str):
+        with open(source) as f:
+            yield from read_note_groups(f)
+        return
+    for line in source:
+        tokens = line.split("#", 1)[0].split()
+        if tokens:
+            yield [parse_pitch(token) for token in tokens]
+
+
+def group_midi_events(events):
+    """Turn a time-ordered stream of ``(time, midi, velocity)`` events into note groups.
+
+    Velocity 0 is a note-off. Each time at least one note starts, the notes
+    sounding once every event at that time is applied are yielded, lowest first.
+    """
+    sounding = set()
+    current_time, onset = None, False
+    for time, midi, velocity in events:
+        if time != current_time:
+            if onset and sounding:
+                yield [Pitch.from_midi(m) for m in sorted(sounding)]
+            current_time, onset = time, False
+        if velocity > 0:
+            sounding.add(midi)
+            onset = True
+        else:
+            sounding.discard(midi)
+    if onset and sounding:
+        yield [Pitch.from_midi(m) for m in sorted(sounding)]
+
+
+def _detect_key(histogram, current=None):
+    """Best major/minor key for a pitch-class histogram; ``current`` is kept unless strictly beaten."""
+    ranked = Key.rank_histogram(histogram, top=None, modes=("major", "minor"))
+    best, best_score = ranked[0]
+    if current is not None and any(key is current and score == best_score for key, score in ranked):
+        return current
+    return best
+
+
+def roman_numeral(chord, key: Key):
+    """Return (numeral, degree) for ``chord`` in ``key``; degree is None for a chromatic root."""
+    degree = key.degree(chord.root)
+    if degree is not None and degree <= len(NUMERALS):
+        numeral = NUMERALS[degree - 1]
+    else:
+        # Chromatic root: name it by letter and mark it against the diatonic note on that letter
+        degree = None
+        tonic = key.scale[0]
+        letter_degree = tonic.letter_distance(chord.root)
+        diatonic = key.scale[letter_degree] if letter_degree < len(key.scale) - 1 else tonic
+        offset = (chord.root.pc - diatonic.pc + 6) % 12 - 6
+        numeral = ("b" * -offset if offset < 0 else "#" * offset) + NUMERALS[letter_degree]
+    if isinstance(chord, GenericChord):
+        return numeral, degree
+    intervals = {(note.pc - chord.root.pc) % 12 for note in chord.notes}
+    if 3 in intervals and 4 not in intervals:
+        numeral = numeral.lower()
+    return numeral + QUALITY_SUFFIXES.get(chord.quality, ""), degree
+
+
+class ProgressionAnalyzer:
+    """Label a stream of note groups with chords, Roman numerals and cadences.
+
+    With no fixed ``key``, the key is re-detected from a histogram over the
+    last ``window`` groups, so memory stays bounded however long the stream.
+    A group identical to the previous one reuses its chord.
+    """
+
+    def __init__(self, key: Key = None, window: int = 32):
+        self.key = key
+        self.window = deque(maxlen=window)
+        self.histogram = [0] * 12
+        self._last_notes = None
+        self._last_chord = None
+        self._last_degree = None
+        self._detected = None
+
+    def _identify(self, notes):
+        spelled = tuple((note.name, note.octave) for note in notes)
+        if spelled == self._last_notes:
+            return self._last_chord
+        # Doubled pitch classes are dropped so octave doublings still match
+        distinct = list({note.pc: note for note in reversed(notes)}.values())[::-1]
+        self._last_notes, self._last_chord = spelled, find_chord(distinct)
+        return self._last_chord
+
+    def _observe(self, notes):
+        pcs = [note.pc for note in notes]
+        if len(self.window) == self.window.maxlen:
+            for pc in self.window[0]:
+                self.histogram[pc] -= 1
+        self.window.append(pcs)
+        for pc in pcs:
+            self.histogram[pc] += 1
+
+    def feed(self, notes) -> ProgressionStep:
+        notes = list(notes)
+        if not notes:
+            raise ValueError("Note group cannot be empty.")
+        chord = self._identify(notes)
+        key = self.key
+        if key is None:
+            self._observe(notes)
+            key = self._detected = _detect_key(self.histogram, self._detected)
+
+        numeral, degree = roman_numeral(chord, key)
+        cadence = CADENCES.get((self._last_degree, degree))
+        self._last_degree = degree
+        return ProgressionStep(notes, chord, key, numeral, FUNCTIONS.get(degree), cadence)
+
+    def analyze(self, groups):
+        """Lazily yield a ProgressionStep per note group."""
+        for notes in groups:
+            yield self.feed(notes)
+
+
+def analyze_progression(groups, key: Key = None, window: int = 32):
+    return ProgressionAnalyzer(key, window).analyze(groups)
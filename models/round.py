@@ -1 +1,90 @@
 """Round module."""
+from collections import Counter
+from models import Deck
+from models.chord_finder import chord_index, _match_row
+from models.deck import card_pc, hand_mask
+
+
+class Tally:
+    """Mergeable counts from simulated hands.
+
+    ``chords`` counts (chord_type, quality) pairs, with (None, None) for hands
+    that form no chord; ``scores`` is a histogram of hand scores. Only plain
+    counters cross process boundaries, never per-hand objects.
+    """
+
+    def __init__(self):
+        self.hands = 0
+        self.chords = Counter()
+        self.scores = Counter()
+
+    def merge(self, other: "Tally"):
+        self.hands += other.hands
+        self.chords.update(other.chords)
+        self.scores.update(other.scores)
+        return self
+
+    @property
+    def mean_score(self):
+        return sum(score * n for score, n in self.scores.items()) / self.hands if self.hands else 0.0
+
+    def __repr__(self):
+        return f"Tally({self.hands} hands, mean score {self.mean_score:.1f})"
+
+
+class Round:
+    """One headless round: shuffle a fresh deck, deal every player a hand, identify and score it.
+
+    With a ``modifiers`` stack, hands are scored from the stack's compiled
+    table for ``key`` instead of the base scores alone; an already compiled
+    ``table`` can be passed instead.
+    """
+
+    # (chips, mult) per chord type; None is a hand that forms no chord
+    base_scores = {
+        None:         (5, 1),
+        "triad":      (30, 3),
+        "seventh":    (60, 4),
+        "ninth":      (100, 6),
+        "eleventh":   (140, 7),
+        "thirteenth": (180, 8),
+    }
+
+    def __init__(self, seed=None, n_players=4, hand_size=4, deck_cards=None, modifiers=None, key=None, table=None):
+        self.seed = seed
+        self.n_players = n_players
+        self.hand_size = hand_size
+        self.modifiers = modifiers
+        self.key = key
+        self.table = table
+        self.deck = Deck(deck_cards, seed=seed)
+
+    @classmethod
+    def score(cls, chord_type):
+        chips, mult = cls.base_scores.get(chord_type, cls.base_scores[None])
+        return chips * mult
+
+    def play(self, tally: Tally = None) -> Tally:
+        """Deal and score every hand, adding the results to ``tally``."""
+        tally = tally or Tally()
+        index = chord_index()
+        matches, entries = index.matches, index.entries
+        table = self.table
+        if table is None and self.modifiers:
+            table = self.modifiers.compile(self.base_scores, self.key)
+        self.deck.shuffle()
+        for hand in self.deck.deal(self.n_players, self.hand_size):
+            found = _match_row([card_pc(card) for card in hand], matches)
+            if found is None:
+                chord_type, quality = None, None
+            else:
+                entry = entries[found[1]]
+                chord_type, quality = entry.chord_type, entry.quality
+            if table is None:
+                score = self.score(chord_type)
+            else:
+                score = table.score(hand_mask(hand), None if found is None else found[0])
+            tally.hands += 1
+            tally.chords[chord_type, quality] += 1
+            tally.scores[score] += 1
+        return tally
@@ -0,0 +1,105 @@
+"""Search module.
+
+Finds the best chords a pool of cards can play. Rather than trying every
+subset of the pool with ``find_chord``, the search walks the chord index's
+pitch-class sets that fit inside the pool's mask, best chord type first,
+and stops as soon as no remaining type can beat the results in hand.
+"""
+import heapq
+import time
+from collections import namedtuple
+from models import Pitch, Round
+from models.chord_finder import chord_index, _build_chord
+from models.deck import card_pc, card_pitch
+
+
+class PlayableHand(namedtuple("PlayableHand", ["score", "chord_type", "quality", "root", "cards"])):
+    """One playable subset: ``cards`` in pool order and the card acting as ``root``."""
+    __slots__ = ()
+
+    def chord(self):
+        """Build the chord object ``find_chord`` would return for ``cards``."""
+        index = chord_index()
+        root = self.root if isinstance(self.root, Pitch) else card_pitch(self.root)
+        mask = sum(1 << _pc(card) for card in self.cards)
+        return _build_chord(root, index.match(mask, root.pc))
+
+
+def _pc(card):
+    return card.pc if isinstance(card, Pitch) else card_pc(card)
+
+
+# chord types -> [(set mask, {root_pc: entry_id}), ...] for every set forming a chord, built once
+_chord_groups = None
+
+
+def _chord_sets():
+    global _chord_groups
+    if _chord_groups is None:
+        index = chord_index()
+        groups = {}
+        for mask, found in enumerate(index.matches):
+            if found:
+                types = tuple(sorted({index.entries[entry_id].chord_type for _, entry_id in found}))
+                groups.setdefault(types, []).append((mask, dict(found)))
+        _chord_groups = groups
+    return _chord_groups
+
+
+def best_hands(cards, k=None, top=5, score=None, budget=None):
+    """Return up to ``top`` PlayableHands from ``cards``, highest score first.
+
+    ``cards`` are Pitch objects or encoded deck cards. ``k`` fixes the number
+    of cards played; by default any chord size is allowed. ``score`` maps
+    ``(chord_type, quality)`` to a number (default: the Round base score).
+    Each pitch-class set is reported once, played with the first card of
+    each pitch class. Roots follow ``find_chord``: the first card, in pool
+    order, that can be the root. With ``budget`` seconds, the search stops
+    early and returns the best found so far (at least one hand if any exists).
+    """
+    if top <= 0:
+        return []
+    if score is None:
+        score = lambda chord_type, quality: Round.score(chord_type)
+    deadline = None if budget is None else time.perf_counter() + budget
+    index = chord_index()
+
+    first_card = {}
+    for card in cards:
+        first_card.setdefault(_pc(card), card)
+    pool = sum(1 << pc for pc in first_card)
+    order = {pc: i for i, pc in enumerate(first_card)}
+
+    # Upper bound per group of chord types, so whole groups are skipped once they cannot place
+    groups = []
+    for sets in _chord_sets().values():
+        entries = {entry_id for _, roots in sets for entry_id in roots.values()}
+        bound = max(score(index.entries[e].chord_type, index.entries[e].quality) for e in entries)
+        groups.append((bound, sets))
+    groups.sort(key=lambda group: -group[0])
+
+    best = []  # min-heap of (score, -size, -mask, PlayableHand); ties favour smaller, then lower, sets
+    timed_out = False
+    for bound, sets in groups:
+        if timed_out or (len(best) == top and bound < best[0][0]):
+            break
+        for mask, roots in sets:
+            if mask & ~pool or (k is not None and mask.bit_count() != k):
+                continue
+            # Out of time: stop at the next candidate, once there is something to return
+            if deadline is not None and best and time.perf_counter() > deadline:
+                timed_out = True
+                break
+            root_pc = min(roots, key=order.__getitem__)
+            entry = index.entries[roots[root_pc]]
+            rank = (score(entry.chord_type, entry.quality), -mask.bit_count(), -mask)
+            if len(best) == top and rank <= best[0][:3]:
+                continue
+            played = tuple(card for pc, card in first_card.items() if mask >> pc & 1)
+            item = rank + (PlayableHand(rank[0], entry.chord_type, entry.quality, first_card[root_pc], played),)
+            if len(best) < top:
+                heapq.heappush(best, item)
+            else:
+                heapq.heapreplace(best, item)
+
+    return [hand for *_, hand in sorted(best, reverse=True)]
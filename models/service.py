@@ -0,0 +1,254 @@
+"""Service module.
+
+An asyncio chord-identification engine shared by many front-ends over
+JSON lines, on a TCP socket or stdin/stdout. Each request line is
+``{"id": 1, "notes": ["C4", "E4", "G4"], "fuzzy": false}`` and is answered
+with ``{"id": 1, "chord": {"root": "C4", "type": "triad", "quality": "major"}}``
+(``"chord": null`` when nothing matches). ``{"id": 2, "op": "stats"}``
+returns batch and latency statistics.
+
+    python -m models.service --port 8765
+    python -m models.service --stdio
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from models.chord_finder import chord_index, find_chords, lookup_chord
+from models.progression import parse_pitch
+
+
+class ChordService:
+    """Micro-batching front of the chord index.
+
+    Requests queue up and are answered in batches of up to ``max_batch``,
+    or whatever has arrived ``max_delay`` seconds after the first request
+    of a batch. Once ``max_pending`` requests are waiting, :meth:`identify`
+    blocks until the batcher catches up.
+    """
+
+    def __init__(self, max_batch=64, max_delay=0.002, max_pending=1024, latency_window=10000):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(max_pending)
+        self.latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.batches = 0
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            index = chord_index()
+            index.matches  # preload the mask table before taking requests
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def identify(self, notes, allow_fuzzy=False):
+        """Return (root, chord_type, quality) for ``notes`` (Pitch objects), or None."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((notes, allow_fuzzy, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._answer(batch)
+            except Exception:
+                # Answer one by one so a bad request fails alone and the batcher keeps running
+                for item in batch:
+                    try:
+                        self._answer([item])
+                    except Exception as e:
+                        if not item[2].done():
+                            item[2].set_exception(e)
+
+    def _answer(self, batch):
+        # Exact requests go through the batch API in one pass; fuzzy ones need the ranked search
+        exact = [i for i, request in enumerate(batch) if not request[1]]
+        found = find_chords([batch[i][0] for i in exact]) if exact else []
+        results = [None] * len(batch)
+        for row, i in enumerate(exact):
+            if found[row] is not None:
+                chord_type, quality, root_pc = found[row]
+                results[i] = root_pc, chord_type, quality
+        for i, (notes, allow_fuzzy, _, _) in enumerate(batch):
+            if allow_fuzzy:
+                results[i] = lookup_chord(notes, allow_fuzzy=True)
+
+        done = time.perf_counter()
+        for (notes, _, future, queued), match in zip(batch, results):
+            self.latencies.append(done - queued)
+            if match is not None:
+                root_pc, chord_type, quality = match
+                # Spell the root as the caller did
+                match = next(note for note in notes if note.pc == root_pc), chord_type, quality
+            if not future.done():
+                future.set_result(match)
+        self.requests += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        """Request and batch counts, and p50/p99 latency in milliseconds over the recent window."""
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1e3 if ordered else None
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "pending": self.queue.qsize(),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+        }
+
+    async def handle(self, line: str) -> dict:
+        """Answer one JSON request line with a response dict."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"error": f"invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            return {"error": "request must be a JSON object"}
+        request_id = request.get("id")
+        if request.get("op") == "stats":
+            return {"id": request_id, "stats": self.stats()}
+        tokens = request.get("notes")
+        if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens):
+            return {"id": request_id, "error": "bad notes: expected a list of note names"}
+        try:
+            notes = [parse_pitch(token) for token in tokens]
+        except ValueError as e:
+            return {"id": request_id, "error": f"bad notes: {e}"}
+        if not notes:
+            return {"id": request_id, "chord": None}
+        try:
+            match = await self.identify(notes, bool(request.get("fuzzy")))
+        except Exception as e:
+            return {"id": request_id, "error": f"lookup failed: {e}"}
+        if match is None:
+            return {"id": request_id, "chord": None}
+        root, chord_type, quality = match
+        return {"id": request_id, "chord": {"root": str(root), "type": chord_type, "quality": quality}}
+
+
+async def _serve_lines(service, read_line, write_line, max_in_flight):
+    # Requests from one client run concurrently so they can share batches;
+    # the semaphore stops a client from queueing without bound.
+    in_flight = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+
+    async def respond(line):
+        try:
+            await write_line(json.dumps(await service.handle(line)))
+        finally:
+            in_flight.release()
+
+    while True:
+        line = await read_line()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        await in_flight.acquire()
+        task = asyncio.create_task(respond(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve_tcp(service, host="127.0.0.1", port=8765, max_in_flight=256):
+    """Start a JSON-lines TCP server on ``service``; returns the asyncio Server."""
+    async def client(reader, writer):
+        async def read_line():
+            return (await reader.readline()).decode()
+
+        async def write_line(text):
+            writer.write(text.encode() + b"\n")
+            await writer.drain()
+
+        try:
+            await _serve_lines(service, read_line, write_line, max_in_flight)
+        finally:
+            writer.close()
+
+    await service.start()
+    return await asyncio.start_server(client, host, port)
+
+
+async def serve_stdio(service, max_in_flight=256):
+    """Answer JSON lines from stdin on stdout until stdin closes."""
+    loop = asyncio.get_running_loop()
+
+    async def read_line():
+        return await loop.run_in_executor(None, sys.stdin.readline)
+
+    async def write_line(text):
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+
+    await service.start()
+    await _serve_lines(service, read_line, write_line, max_in_flight)
+
+
+async def _main(args):
+    async with ChordService(args.max_batch, args.max_delay / 1e3, args.max_pending) as service:
+        if args.stdio:
+            await serve_stdio(service)
+            return
+        server = await serve_tcp(service, args.host, args.port)
+        print(f"Serving chord identification on {args.host}:{args.port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON-lines chord identification service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stdio", action="store_true", help="serve stdin/stdout instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay", type=float, default=2.0, help="batch deadline in milliseconds")
+    parser.add_argument("--max-pending", type=int, default=1024, help="queued requests before callers wait")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Session module.
+
+A table of players drawing from one deck, changed only through actions that
+are appended to an :class:`ActionLog`. ``Session.snapshot()`` packs the whole
+state into a few hundred bytes and ``Session.restore()`` reads it back;
+:func:`replay` restores a snapshot and re-applies a log, reproducing the
+session exactly. Modifiers are referred to by their id, the position in the
+session's ``catalog``, so nothing is pickled and predicates never need to be
+serialized.
+"""
+import random
+import struct
+from array import array
+from collections import OrderedDict
+from models import Deck, Key, Round
+from models.modifier import ModifierStack
+from models.player import Player
+
+# Snapshot layout, all little-endian:
+#   header    magic, version, player count, key length, active modifier count, deck size, actions applied
+#   key       utf-8 "tonic mode", empty for no key
+#   active    uint16 modifier ids, in stack order
+#   deck      uint32 encoded cards, top of the deck last
+#   players   per player: score (int64), card count, chord count (uint16), uint32 cards,
+#             then 3 bytes per chord: root pc, type id, quality id (255 x 3 for no chord)
+SNAPSHOT_MAGIC = b"MTSS"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sBBBHHI")
+_PLAYER = struct.Struct("<qHH")
+_NO_CHORD = b"\xff\xff\xff"
+
+# Action opcodes; each log record is the opcode byte followed by its fixed operands.
+# Card positions are a bit mask over the player's hand.
+SHUFFLE, DRAW, PLAY, DISCARD, ADD_MODIFIER, REMOVE_MODIFIER = range(1, 7)
+_ACTIONS = {
+    SHUFFLE: struct.Struct("<BQ"),          # seed
+    DRAW: struct.Struct("<BBB"),            # player, count
+    PLAY: struct.Struct("<BBI"),            # player, positions
+    DISCARD: struct.Struct("<BBI"),         # player, positions
+    ADD_MODIFIER: struct.Struct("<BH"),     # modifier id
+    REMOVE_MODIFIER: struct.Struct("<BH"),  # modifier id
+}
+
+
+class ActionLog:
+    """Append-only binary log of session actions.
+
+    Records live in ``data``; with ``path`` each one is also appended to that
+    file as it happens, so a crashed session can still be replayed.
+    """
+
+    def __init__(self, data=b"", path=None):
+        self.data = bytearray(data)
+        self.path = path
+        self._file = open(path, "ab") if path else None
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    @staticmethod
+    def pack(op, *args) -> bytes:
+        """Encode one record; raises ValueError for an unknown action or operands out of range."""
+        layout = _ACTIONS.get(op)
+        if layout is None:
+            raise ValueError(f"Unknown action {op}")
+        try:
+            return layout.pack(op, *args)
+        except struct.error as e:
+            raise ValueError(f"Bad operands for action {op}: {args}") from e
+
+    def append(self, op, *args):
+        self.write(self.pack(op, *args))
+
+    def write(self, record: bytes):
+        """Append an already packed record."""
+        self.data += record
+        if self._file is not None:
+            self._file.write(record)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __iter__(self):
+        """Yield (opcode, *operands) for each record in order."""
+        data, offset = self.data, 0
+        while offset < len(data):
+            layout = _ACTIONS.get(data[offset])
+            if layout is None:
+                raise ValueError(f"Unknown action {data[offset]} at byte {offset}")
+            yield layout.unpack_from(data, offset)
+            offset += layout.size
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+    def __repr__(self):
+        return f"ActionLog({len(self.data)} bytes)"
+
+
+# (modifiers, key) -> compiled scoring table, shared by sessions so replays skip recompiling
+_tables = OrderedDict()
+tables_maxsize = 8
+
+
+def _array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def _mask(positions):
+    positions = set(positions)
+    if any(i < 0 for i in positions):
+        raise IndexError("Card positions cannot be negative")
+    return sum(1 << i for i in positions)
+
+
+def _positions(mask):
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+class Session:
+    """Deck, players and active modifiers, changed through logged actions.
+
+    ``catalog`` lists every modifier the session may use; ``active`` holds
+    the ids of those in play, in stack order. ``actions`` counts the actions
+    applied so far, including those before a restored snapshot.
+    """
+
+    def __init__(self, n_players=2, seed=None, catalog=(), key=None, deck_cards=None, log=None):
+        self.deck = Deck(deck_cards, seed=seed)
+        self.players = [Player() for _ in range(n_players)]
+        self.catalog = list(catalog)
+        self.active = []
+        self.key = key
+        self.log = ActionLog() if log is None else log
+        self.actions = 0
+
+    # --- Actions ---
+
+    def shuffle(self, seed=None):
+        """Shuffle the deck; the seed used is logged so replays shuffle the same way."""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._record(SHUFFLE, seed)
+
+    def draw(self, player: int, count=1):
+        self._record(DRAW, player, count)
+
+    def play(self, player: int, positions) -> int:
+        """Play the cards at ``positions`` in ``player``'s hand and return the score."""
+        return self._record(PLAY, player, _mask(positions))
+
+    def discard(self, player: int, positions):
+        self._record(DISCARD, player, _mask(positions))
+
+    def add_modifier(self, modifier_id: int):
+        self._record(ADD_MODIFIER, modifier_id)
+
+    def remove_modifier(self, modifier_id: int):
+        self._record(REMOVE_MODIFIER, modifier_id)
+
+    def _record(self, op, *args):
+        # Encode first and apply before logging: a rejected action changes nothing and is never logged
+        record = self.log.pack(op, *args)
+        result = self.apply(op, *args)
+        self.log.write(record)
+        return result
+
+    def _check(self, op, args):
+        # Every action is validated before it touches any state
+        if op in (DRAW, PLAY, DISCARD) and not 0 <= args[0] < len(self.players):
+            raise IndexError(f"No player {args[0]}")
+        if op == DRAW and args[1] > len(self.deck):
+            raise ValueError(f"Cannot draw {args[1]} cards from a deck of {len(self.deck)}")
+        if op in (PLAY, DISCARD) and args[1] >> len(self.players[args[0]].cards):
+            raise IndexError(f"Card position out of range for a hand of {len(self.players[args[0]].cards)}")
+        if op == ADD_MODIFIER and not 0 <= args[0] < len(self.catalog):
+            raise IndexError(f"No modifier with id {args[0]}")
+        if op == REMOVE_MODIFIER and args[0] not in self.active:
+            raise ValueError(f"Modifier {args[0]} is not active")
+
+    def apply(self, op, *args):
+        """Apply one action without logging it; raises before changing anything if it is invalid."""
+        self.log.pack(op, *args)
+        self._check(op, args)
+        if op == SHUFFLE:
+            result = self.deck.shuffle(args[0])
+        elif op == DRAW:
+            result = self.players[args[0]].draw(self.deck, args[1])
+        elif op == PLAY:
+            result = self.players[args[0]].play(_positions(args[1]), self.table())
+        elif op == DISCARD:
+            result = self.players[args[0]].discard(_positions(args[1]))
+        elif op == ADD_MODIFIER:
+            result = self.active.append(args[0])
+        else:
+            result = self.active.remove(args[0])
+        self.actions += 1
+        return result
+
+    def table(self):
+        """The compiled scoring table for the active modifiers, or None when none are active."""
+        if not self.active:
+            return None
+        modifiers = tuple(self.catalog[i] for i in self.active)
+        cache_key = (modifiers, self.key)
+        table = _tables.get(cache_key)
+        if table is None:
+            table = _tables[cache_key] = ModifierStack(modifiers).compile(Round.base_scores, self.key)
+            while len(_tables) > tables_maxsize:
+                _tables.popitem(last=False)
+        else:
+            _tables.move_to_end(cache_key)
+        return table
+
+    # --- Snapshots ---
+
+    def snapshot(self) -> bytes:
+        """Pack the current state into the binary snapshot format."""
+        key = f"{self.key.original_tonic} {self.key.mode}".encode() if self.key is not None else b""
+        parts = [
+            _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self.players), len(key),
+                         len(self.active), len(self.deck.cards), self.actions),
+            key,
+            array("H", self.active).tobytes(),
+            self.deck.cards.tobytes(),
+        ]
+        for player in self.players:
+            parts.append(_PLAYER.pack(player.score, len(player.cards), len(player.chords)))
+            parts.append(array("I", player.cards).tobytes())
+            parts.append(b"".join(_NO_CHORD if chord is None else bytes(chord) for chord in player.chords))
+        return b"".join(parts)
+
+    @classmethod
+    def restore(cls, data: bytes, catalog=(), log=None) -> "Session":
+        """Rebuild a session from :meth:`snapshot` bytes; ``catalog`` must match the one the ids refer to."""
+        view = memoryview(data)
+        magic, version, n_players, key_len, n_active, deck_size, actions = _HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} session snapshot")
+        offset = _HEADER.size
+        key = bytes(view[offset:offset + key_len]).decode()
+        offset += key_len
+        active = _array("H", view[offset:offset + 2 * n_active])
+        offset += 2 * n_active
+        deck = _array("I", view[offset:offset + 4 * deck_size])
+        offset += 4 * deck_size
+
+        session = cls(0, catalog=catalog, key=Key(*key.split()) if key else None, deck_cards=deck, log=log)
+        session.active = active.tolist()
+        session.actions = actions
+        for _ in range(n_players):
+            score, n_cards, n_chords = _PLAYER.unpack_from(view, offset)
+            offset += _PLAYER.size
+            cards = _array("I", view[offset:offset + 4 * n_cards])
+            offset += 4 * n_cards
+            chords = view[offset:offset + 3 * n_chords]
+            offset += 3 * n_chords
+            session.players.append(Player(cards, score, [None if chords[i] == 255 else tuple(chords[i:i + 3])
+                                                         for i in range(0, len(chords), 3)]))
+        return session
+
+
+def replay(snapshot: bytes, log, catalog=(), until=None) -> Session:
+    """Restore ``snapshot`` and apply the actions of ``log`` that came after it.
+
+    ``log`` is an :class:`ActionLog` or its bytes, recorded from the start of
+    the session; actions already counted in the snapshot are skipped. With
+    ``until``, stop once that many actions have been applied in total.
+    """
+    session = Session.restore(snapshot, catalog)
+    actions = log if isinstance(log, ActionLog) else ActionLog(log)
+    for number, (op, *args) in enumerate(actions):
+        if until is not None and number >= until:
+            break
+        if number >= session.actions:
+            session.apply(op, *args)
+    return session
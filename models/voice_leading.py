@@ -0,0 +1,145 @@
+"""Voice-leading module.
+
+Measures how far the voices move between two chords. Each note of the
+smaller chord moves to a distinct note of the larger one, and notes of the
+larger chord left over are reached from their nearest note in the other
+chord, as a doubled voice would be; both are chosen together by one optimal
+(Hungarian) assignment.
+Distances are semitones between MIDI numbers when every note has an octave,
+and the shorter way round the pitch-class circle otherwise.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+# ``moves`` pairs each note of the first chord with a note of the second
+VoiceLeading = namedtuple("VoiceLeading", ["distance", "moves"])
+
+
+def _pc_distance(a, b):
+    step = (b - a) % 12
+    return min(step, 12 - step)
+
+
+def _midi_distance(a, b):
+    return abs(b - a)
+
+
+def _hungarian(cost):
+    """Minimum-cost assignment of every row to a distinct column (rows <= columns).
+
+    Returns the column chosen for each row.
+    """
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0] * (n + 1), [0] * (m + 1)
+    match = [0] * (m + 1)  # column -> row, 1-based; 0 is free
+    way = [0] * (m + 1)
+    for row in range(1, n + 1):
+        match[0] = row
+        col = 0
+        min_slack = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[col] = True
+            r, delta, next_col = match[col], inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    slack = cost[r - 1][j - 1] - u[r] - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j], way[j] = slack, col
+                    if min_slack[j] < delta:
+                        delta, next_col = min_slack[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            col = next_col
+            if match[col] == 0:
+                break
+        while col:
+            previous = way[col]
+            match[col] = match[previous]
+            col = previous
+    assigned = [0] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            assigned[match[j] - 1] = j - 1
+    return assigned
+
+
+def _lead(a, b, distance):
+    """Return (total, pairs) moving values ``a`` to values ``b``; pairs are (a value, b value)."""
+    flipped = len(a) > len(b)
+    rows, cols = (b, a) if flipped else (a, b)
+    cost = [[distance(x, y) for y in cols] for x in rows]
+    # One dummy row per surplus column, costing the nearest real row's distance, so the
+    # distinct matches and the doubled voices are optimized together
+    nearest = [min(range(len(rows)), key=lambda i: cost[i][j]) for j in range(len(cols))]
+    dummy = [cost[nearest[j]][j] for j in range(len(cols))]
+    assigned = _hungarian(cost + [dummy] * (len(cols) - len(rows)))
+    pairs = [(rows[i], cols[j]) for i, j in enumerate(assigned[:len(rows)])]
+    pairs += [(rows[nearest[j]], cols[j]) for j in assigned[len(rows):]]
+    total = sum(distance(x, y) for x, y in pairs)
+    if flipped:
+        pairs = [(y, x) for x, y in pairs]
+    return total, tuple(sorted(pairs))
+
+
+@lru_cache(maxsize=4096)
+def _pc_leading(a_mask, b_mask):
+    a = [pc for pc in range(12) if a_mask >> pc & 1]
+    b = [pc for pc in range(12) if b_mask >> pc & 1]
+    return _lead(a, b, _pc_distance)
+
+
+@lru_cache(maxsize=4096)
+def _midi_leading(a_midi, b_midi):
+    return _lead(list(a_midi), list(b_midi), _midi_distance)
+
+
+def _notes(chord):
+    return chord.notes if hasattr(chord, "notes") else list(chord)
+
+
+def voice_leading(a, b) -> VoiceLeading:
+    """Minimal total voice movement from ``a`` to ``b`` (chords or lists of Pitch)."""
+    a_notes, b_notes = _notes(a), _notes(b)
+    if not a_notes or not b_notes:
+        raise ValueError("Both chords need at least one note.")
+    if all(note.midi is not None for note in a_notes + b_notes):
+        by_midi = {note.midi: note for note in reversed(a_notes + b_notes)}
+        total, pairs = _midi_leading(tuple(sorted(n.midi for n in a_notes)), tuple(sorted(n.midi for n in b_notes)))
+        return VoiceLeading(total, tuple((by_midi[x], by_midi[y]) for x, y in pairs))
+
+    # Pitch-class sets: results are shared by every voicing and spelling of the same sets
+    a_by_pc = {note.pc: note for note in reversed(a_notes)}
+    b_by_pc = {note.pc: note for note in reversed(b_notes)}
+    total, pairs = _pc_leading(sum(1 << pc for pc in a_by_pc), sum(1 << pc for pc in b_by_pc))
+    return VoiceLeading(total, tuple((a_by_pc[x], b_by_pc[y]) for x, y in pairs))
+
+
+def progression_distances(chords):
+    """Voice-leading distance between each pair of consecutive chords."""
+    chords = list(chords)
+    return [voice_leading(a, b).distance for a, b in zip(chords, chords[1:])]
+
+
+def rank_next(current, candidates):
+    """Rank ``candidates`` by how smoothly ``current`` moves to them; returns [(distance, candidate), ...].
+
+    Ties keep the candidates' order.
+    """
+    scored = [(voice_leading(current, candidate).distance, i, candidate) for i, candidate in enumerate(candidates)]
+    scored.sort(key=lambda item: item[:2])
+    return [(distance, candidate) for distance, _, candidate in scored]
+
+
+def cache_info():
+    return {"pitch_class": _pc_leading.cache_info()._asdict(), "midi": _midi_leading.cache_info()._asdict()}
+
+
+def cache_clear():
+    _pc_leading.cache_clear()
+    _midi_leading.cache_clear()
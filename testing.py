@@ -1,4 +1,9 @@
+import os
+import subprocess
+import sys
 from models import *
+from models.chord_index import pc_mask, rotate_mask
+from models.chord_finder import CHORD_INDEX, rank_chords
 import pytest
 from pytest import main
 
@@ -42,6 +47,23 @@ def test_key():
     except ValueError as e:
         assert str(e) == "Unsupported mode: invalid_mode"
 
+def test_key_cache():
+    key = Key("Eb", "dorian")
+    before = Key.cache_info()
+    assert Key("Eb", "DORIAN") is key
+    after = Key.cache_info()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert 0 < after["size"] <= after["maxsize"]
+
+    assert key.degree(Pitch("Gb")) == 3
+    assert key.degree(Pitch("G")) is None
+    assert Pitch("Db") in key and Pitch("D") not in key
+    assert key.pc_set == {p.pc for p in key.scale}
+
+    with pytest.raises(AttributeError):
+        key.mode = "major"
+
 def test_pitch():
     """Case 2"""
 
@@ -63,6 +85,18 @@ def test_pitch():
         assert str(e) == "Invalid pitch name: Invalid"
 
 
+def test_pitch_interning():
+    assert Pitch("C#", 4) is Pitch("C#", 4)
+    assert Pitch("C#", 4) is not Pitch("Db", 4)
+
+    # Hashing agrees with equality, so pitches work in sets and as dict keys
+    assert {Pitch("C#", 4), Pitch("Db", 4)} == {Pitch("C#", 4)}
+    assert {Pitch("E"): "third"}[Pitch("Fb")] == "third"
+
+    with pytest.raises(AttributeError):
+        Pitch("C").octave = 4
+
+
 def test_intervals():
     base = Pitch("C", 5)
 
@@ -112,6 +146,22 @@ def test_intervals():
         #       f" {interval.semitones}, {interval.letter_steps}")
         assert interval.name == expected
 
+def test_intervals_matrix():
+    pitches = [Pitch("C", 5), Pitch("E", 5), Pitch("Bb", 4), Pitch("B#", 6), Pitch("D")]
+    matrix = intervals_matrix(pitches)
+    assert matrix.shape == (5, 5) and len(matrix.codes) == 25
+    for i, low in enumerate(pitches):
+        for j, high in enumerate(pitches):
+            interval = Interval(low, high)
+            assert matrix.name((i, j)) == interval.name
+            assert matrix.semitones[i * 5 + j] == interval.semitones
+            assert matrix.letter_steps[i * 5 + j] == interval.letter_steps
+
+    paired = Interval.from_arrays([Pitch("C", 4), Pitch("F", 4)], [Pitch("G", 4), Pitch("B", 4)])
+    assert paired.names() == ["P5", "A4"]
+    with pytest.raises(ValueError):
+        Interval.from_arrays([Pitch("C")], [])
+
 def test_add_interval():
     base = Pitch("C", 5)
 
@@ -138,6 +188,18 @@ def test_add_interval():
     except ValueError as e:
         assert str(e) == "Unsupported interval: Invalid"
 
+def test_spelling_tables():
+    assert Key.spellings[(0, "B")] == "B#"
+    assert Key.spellings[(3, "F")] == "Fbb"
+    assert Key("C").find_spelling(11, "C") == "Cb"
+    with pytest.raises(ValueError):
+        Key("C").find_spelling(6, "C")
+
+    from models.interval import interval_steps
+    assert interval_steps["M3"] == (4, 2)
+    assert interval_steps["m9"] == (13, 1)
+    assert interval_steps["P15"] == (24, 0)
+
 @pytest.mark.parametrize("root, quality, exp, mode", [
     ("C", "major",      ["C", "E", "G"],        "major"),
     ("D", "minor",      ["D", "F", "A"],        "minor"),
@@ -249,9 +311,592 @@ def test_generic_chord_fallback(notes):
     assert isinstance(chord, GenericChord)
 
 
+def test_chord_index():
+    assert pc_mask([0, 4, 7]) == 0b10010001
+    # E-G-C heard from C is a major triad
+    assert rotate_mask(pc_mask([4, 7, 0]), 0) == pc_mask([0, 4, 7])
+    assert rotate_mask(pc_mask([9, 0, 4]), 9) == pc_mask([0, 3, 7])
 
+    entry = CHORD_INDEX.match(pc_mask([5, 9, 0, 4]), 5)
+    assert (entry.chord_type, entry.quality) == ("seventh", "major7")
+    assert CHORD_INDEX.match(pc_mask([0, 4, 11]), 0) is None
 
 
+@pytest.mark.parametrize("notes, expected_root", [
+    # Symmetric chords take the first note that works as a root
+    ([Pitch("E"), Pitch("G#"), Pitch("C")], Pitch("E")),
+    ([Pitch("G#"), Pitch("C"), Pitch("E")], Pitch("G#")),
+])
+def test_find_chord_root_order(notes, expected_root):
+    chord = find_chord(notes)
+    assert chord.quality == "augmented"
+    assert chord.root == expected_root
+
+
+def test_find_chord_doubled_notes():
+    # A doubled pitch class never matches exactly, as with the permutation search
+    assert isinstance(find_chord([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("C")]), GenericChord)
+    assert find_chord([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("C")], allow_fuzzy=True).quality == "major"
+
+
+def test_find_chords_batch():
+    hands = [
+        [Pitch("A"), Pitch("C"), Pitch("E"), Pitch("F")],
+        [0, 4, 7],
+        pc_mask([7, 11, 2, 5]),
+        [Pitch("C"), Pitch("E"), Pitch("B")],
+    ]
+    matches = find_chords(hands)
+
+    assert len(matches) == 4
+    assert matches[0] == ("seventh", "major7", 5)
+    assert matches[1] == ("triad", "major", 0)
+    assert matches[2] == ("seventh", "dominant7", 7)
+    assert matches[3] is None
+    assert list(matches.roots) == [5, 0, 7, -1]
+
+    chords = matches.chords()
+    assert isinstance(chords[0], SeventhChord) and chords[0].root == Pitch("F")
+    assert chords[1].notes == [Pitch("C"), Pitch("E"), Pitch("G")]
+    assert isinstance(chords[3], GenericChord)
+
+def test_import_outside_repo_root(tmp_path):
+    # The chord database is found relative to the package and only parsed on first use
+    probe = ("import models, models.chord_finder as cf; assert cf._chord_db is None; "
+             "print(models.find_chord([models.Pitch('C'), models.Pitch('E'), models.Pitch('G')]).quality)")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "major"
+
+def test_rank_chords():
+    # C-E-Bb is a dominant 7th without its fifth
+    ranked = rank_chords([Pitch("C"), Pitch("E"), Pitch("Bb")], top_k=3)
+    assert [(c.quality, c.missing, c.extra) for c in ranked] == [
+        ("dominant7", 1, 0), ("augmented7", 1, 0), ("major", 1, 1)]
+    assert ranked[0].root == Pitch("C")
+    assert find_chord([Pitch("C"), Pitch("E"), Pitch("Bb")], allow_fuzzy=True).quality == "dominant7"
+
+    # A perfect match ranks first
+    ranked = rank_chords([Pitch("D"), Pitch("F"), Pitch("A"), Pitch("C")], top_k=2)
+    assert (ranked[0].quality, ranked[0].distance) == ("minor7", 0)
+    assert ranked[1].distance > 0
+
+    # One extra note costs less than a missing one plus an extra
+    ranked = rank_chords([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("B"), Pitch("D"), Pitch("F")], top_k=1)
+    assert (ranked[0].quality, ranked[0].missing, ranked[0].extra) == ("major9", 0, 1)
+
+def test_hand_tracks_chord():
+    hand = Hand([Pitch("C"), Pitch("E")])
+    assert hand.match is None
+    assert isinstance(hand.chord, GenericChord)
+
+    hand.add(Pitch("G"))
+    assert hand.match == ("triad", "major", 0)
+    assert hand.mask == pc_mask([0, 4, 7])
+
+    hand.add(Pitch("Bb"))
+    assert hand.match == ("seventh", "dominant7", 0)
+    assert isinstance(hand.chord, SeventhChord)
+
+    hand.swap(Pitch("C"), Pitch("D"))
+    assert hand.match == ("seventh", "half-diminished7", 4)
+
+    # Doubling a pitch class behaves like find_chord: no exact chord
+    hand.add(Pitch("E"))
+    assert hand.match is None and hand.counts[4] == 2
+    hand.remove(Pitch("E"))
+    assert hand.match == ("seventh", "half-diminished7", 4)
+    assert hand.chord.root == Pitch("E")
+
+    with pytest.raises(ValueError):
+        hand.remove(Pitch("F"))
+
+def test_deck():
+    from models.deck import encode_card, card_pitch, card_pc, card_modifiers, hand_mask
+
+    card = encode_card(Pitch("Db", 4), modifiers=0b101)
+    assert card_pitch(card) is Pitch("Db", 4)
+    assert card_pc(card) == 1 and card_modifiers(card) == 0b101
+    assert card_pitch(encode_card(Pitch("E#"))) is Pitch("E#")
+
+    deck = Deck(seed=7)
+    assert len(deck) == 48 and deck.cards.itemsize == 4
+    deck.shuffle()
+    again = Deck(seed=7)
+    again.shuffle()
+    assert deck.cards == again.cards
+
+    top = deck.cards[-1]
+    assert deck.draw() == top and len(deck) == 47
+
+    hands = deck.deal(3, 5)
+    assert len(deck) == 32
+    assert [len(hand) for hand in hands] == [5, 5, 5]
+    assert isinstance(hands[0], memoryview)
+    assert hand_mask(hands[0]) == pc_mask(card_pc(c) for c in hands[0])
+    with pytest.raises(ValueError):
+        deck.deal(4, 10)
+
+def test_round_and_game_simulation():
+    tally = Round(seed=3, n_players=2, hand_size=3).play()
+    assert tally.hands == 2
+    assert sum(tally.chords.values()) == sum(tally.scores.values()) == 2
+
+    # Seeds are per round, so the worker count does not change the results
+    game = Game(seed=11, n_players=3, hand_size=4)
+    serial = game.simulate(40, workers=1, chunk_size=10)
+    parallel = game.simulate(40, workers=2, chunk_size=10)
+    assert serial.hands == parallel.hands == 120
+    assert serial.chords == parallel.chords
+    assert serial.scores == parallel.scores
+
+def test_chord_dictionary_incremental():
+    import chord_dictionary
+    from models.chord_finder import chord_db
+
+    data = chord_dictionary.make_chords_hierarchical(workers=1)
+    assert data == chord_db()
+
+    # Only the quality whose definition hash changed is rebuilt
+    hashes = chord_dictionary.chord_hashes()
+    assert chord_dictionary.stale_qualities(previous=data, manifest=hashes) == []
+    hashes["seventh/major7"] = "stale"
+    assert chord_dictionary.stale_qualities(previous=data, manifest=hashes) == [("seventh", "major7")]
+    assert chord_dictionary.make_chords_hierarchical(previous=data, manifest=hashes, workers=1) == data
+
+    extended = chord_dictionary.make_chords_hierarchical(["eleventh", "thirteenth"], workers=1)
+    assert extended["thirteenth"]["G"]["dominant13"]["notes"] == ["G", "B", "D", "F", "A", "E"]
+
+    by_mode = chord_dictionary.make_chords_by_mode(data, ["dorian", "blues"], workers=1)
+    assert list(by_mode) == ["dorian"]
+    manifest = chord_dictionary.mode_hashes(data, ["dorian", "blues"])
+    assert chord_dictionary.stale_modes(data, ["dorian"], by_mode, manifest) == []
+    assert chord_dictionary.stale_modes(data, ["dorian"], {}, manifest) == ["dorian"]
+    assert [d["seventh"] for d in by_mode["dorian"]["D"]][:5] == [
+        "minor7", "minor7", "major7", "dominant7", "minor7"]
+
+def test_all_families_score_and_label(monkeypatch):
+    import chord_dictionary
+    from models import chord_finder, search
+    from models.chord_index import ChordIndex
+
+    data = chord_dictionary.make_chords_hierarchical(list(chord_dictionary.CHORD_FAMILIES), workers=1)
+    monkeypatch.setattr(chord_finder, "_chord_index", ChordIndex(data))
+    monkeypatch.setattr(search, "_chord_groups", None)
+    chord_finder.result_cache_clear()
+
+    assert Round.score("thirteenth") > Round.score("eleventh") > Round.score("ninth")
+    # C E G Bb D F: the full eleventh beats every ninth inside it
+    pool = [Pitch(name) for name in ["C", "E", "G", "Bb", "D", "F"]]
+    best = best_hands(pool, top=2)
+    assert best[0].chord_type == "eleventh" and best[0].score > best[1].score
+    assert best[1].chord_type == "ninth"
+
+    from models.progression import QUALITY_SUFFIXES
+    for chord_type in ("eleventh", "thirteenth"):
+        assert set(chord_dictionary.CHORD_FAMILIES[chord_type].QUALITY_INTERVALS) <= set(QUALITY_SUFFIXES)
+    chord_finder.result_cache_clear()
+
+
+@pytest.mark.parametrize("notes, name, inversion, bass", [
+    ([Pitch("G", 3), Pitch("C", 4), Pitch("E", 3)], "Cmajor/E", 1, Pitch("E", 3)),
+    ([Pitch("C", 4), Pitch("E", 4), Pitch("G", 3)], "Cmajor/G", 2, Pitch("G", 3)),
+    ([Pitch("Bb", 2), Pitch("C", 4), Pitch("E", 4), Pitch("G", 4)], "Cdominant7/Bb", 3, Pitch("Bb", 2)),
+    # Doubled notes are fine when voicing
+    ([Pitch("C", 3), Pitch("G", 3), Pitch("C", 4), Pitch("E", 4)], "Cmajor", 0, Pitch("C", 3)),
+    # Without octaves the notes are read bottom-up as given
+    ([Pitch("A"), Pitch("C"), Pitch("F")], "Fmajor/A", 1, Pitch("A")),
+])
+def test_identify_voicing(notes, name, inversion, bass):
+    voicing = identify_voicing(notes)
+    assert voicing.name == name
+    assert voicing.inversion == inversion
+    assert voicing.bass == bass
+    assert voicing.chord.root == voicing.root
+
+
+def test_identify_voicing_prefers_bass_root():
+    voicing = identify_voicing([Pitch("G#", 3), Pitch("C", 4), Pitch("E", 4)])
+    assert voicing.name == "G#augmented" and voicing.inversion == 0
+    assert identify_voicing([Pitch("C", 3), Pitch("D", 3)]) is None
+
+def test_progression_analyzer():
+    from models.progression import read_note_groups, group_midi_events
+
+    lines = ["C4 E4 G4", "D4 F4 A4  # ii", "", "G3 B3 D4 F4", "C4 E4 G4 C5", "A3 C4 E4"]
+    steps = list(analyze_progression(read_note_groups(lines), key=Key("C")))
+    assert [s.numeral for s in steps] == ["I", "ii", "V7", "I", "vi"]
+    assert [s.function for s in steps] == ["tonic", "predominant", "dominant", "tonic", "tonic"]
+    assert [s.cadence for s in steps] == [None, None, "half", "authentic", None]
+    assert steps[3].chord.quality == "major"  # the doubled C still identifies
+
+    # Repeated groups reuse the previous chord
+    analyzer = ProgressionAnalyzer(Key("A", "minor"))
+    first = analyzer.feed([Pitch("E"), Pitch("G#"), Pitch("B")])
+    again = analyzer.feed([Pitch("E"), Pitch("G#"), Pitch("B")])
+    assert again.chord is first.chord and again.numeral == "V"
+    assert analyzer.feed([Pitch("F"), Pitch("A"), Pitch("C")]).cadence == "deceptive"
+
+    # Key detection from the stream, and MIDI-style note on/off events
+    events = [(0, 60, 80), (0, 64, 80), (0, 67, 80), (1, 60, 0), (1, 64, 0), (1, 67, 0),
+              (1, 55, 80), (1, 59, 80), (1, 62, 80), (1, 65, 80), (2, 55, 0), (2, 59, 0), (2, 62, 0),
+              (2, 65, 0), (2, 60, 80), (2, 64, 80), (2, 67, 80)]
+    groups = list(group_midi_events(events))
+    assert groups[1] == [Pitch("G", 3), Pitch("B", 3), Pitch("D", 4), Pitch("F", 4)]
+    steps = list(analyze_progression(groups))
+    assert steps[-1].key == Key("C")
+    assert steps[-1].cadence == "authentic"
+
+
+
+def test_key_detect():
+    ranked = Key.detect([Pitch(n) for n in ["C", "E", "G", "B", "D", "F"]], top=3, modes=("major", "minor"))
+    assert [key for key, _ in ranked] == [Key("C"), Key("F"), Key("G")]
+    assert ranked[0][1] > ranked[1][1]
+
+    minor_only = Key.detect([Pitch("A"), Pitch("C"), Pitch("E")], top=None, modes=("minor",))
+    assert len(minor_only) == 12 and all(key.mode == "minor" for key, _ in minor_only)
+    best = Key.detect_batch([[Pitch("A"), Pitch("C"), Pitch("E")], [Pitch("G"), Pitch("B"), Pitch("D")]],
+                            modes=("major", "minor"))
+    assert [found[0][0] for found in best] == [Key("A", "minor"), Key("G")]
+
+
+def test_modifier_stack_compiles_scores():
+    jazz = Modifier("Jazz", mult=4, chord_type="seventh")
+    stack = ModifierStack([jazz, Modifier("Tritone", chips=20, interval=6), Modifier("Diatonic", xmult=2, in_key=True)])
+    table = stack.compile(Round.base_scores, Key("C"))
+    assert stack.compile(Round.base_scores, Key("C")) is table
+    assert table.score(pc_mask([7, 11, 2, 5]), 7) == (60 + 20) * (4 + 4) * 2  # G7
+    assert table.score(pc_mask([1, 5, 8]), 1) == 30 * 3  # Db major: no tritone, out of key
+    assert table.score(pc_mask([0, 2])) == 5 * 1 * 2
+    assert [cost.name for cost in sorted(stack.profile())] == ["Diatonic", "Jazz", "Tritone"]
+    assert all(cost.evaluations > 4096 and cost.hits for cost in stack.profile())
+
+    stack.remove(jazz)
+    assert stack.compile(Round.base_scores, Key("C")).score(pc_mask([7, 11, 2, 5]), 7) == 80 * 4 * 2
+
+    # Rounds score through the table, in-process and across workers alike, even with predicates
+    stack.add(Modifier("Wide", mult=1, when=lambda context: context.pcs.bit_count() >= 4))
+    game = Game(seed=3, modifiers=stack, key=Key("C"))
+    assert game.simulate(40, workers=1).scores == game.simulate(40, workers=2, chunk_size=10).scores
+
+
+def test_benchmark_suite_flags_regressions():
+    from benchmarks.suite import cases, compare, measure
+
+    baseline = {"pitch": 1000.0, "key": 1000.0, "find_chord.3": 1000.0}
+    results = {"pitch": 850.0, "key": 700.0, "find_chord.3": 1200.0, "interval": 5.0}
+    assert compare(results, baseline, threshold=0.2) == [("key", 1000.0, 700.0)]
+
+    func, ops = cases()["find_chord.4.inverted.fuzzy"]
+    assert measure(func, ops, repeat=1, min_time=0.001) > 0
+
+
+def test_instrumentation_sampling():
+    from models import instrumentation
+
+    from models.chord_finder import result_cache_clear
+
+    find_chord([Pitch("C"), Pitch("E"), Pitch("G")])
+    Key.cache_clear()
+    result_cache_clear()
+    with instrumentation.sampling(reset=True):
+        assert instrumentation.enabled
+        find_chord([Pitch("E"), Pitch("G"), Pitch("C")])
+        find_chord([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("C#")], allow_fuzzy=True)
+    assert not instrumentation.enabled
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["counters"]["find_chord.3.exact"] == 1
+    assert snapshot["counters"]["find_chord.4.fuzzy"] == 1
+    assert snapshot["counters"]["find_chord.fuzzy_comparisons"] == 4 * len(CHORD_INDEX)
+    assert snapshot["counters"]["find_chord.cache_misses"] == 2 and snapshot["counters"]["find_chord.probes"] == 2
+    assert snapshot["timings"]["find_chord"]["count"] == 2
+    assert snapshot["timings"]["find_chord.3.exact"]["slowest"] == "E G C"
+    assert "key.build" in snapshot["timings"] and "chord.Triad" in snapshot["timings"]
+
+    # Outside the block nothing more is recorded
+    find_chord([Pitch("C"), Pitch("E"), Pitch("G")])
+    assert instrumentation.snapshot()["timings"]["find_chord"]["count"] == 2
+
+    # A repeated pitch-class set is a cache hit and probes nothing; rank_chords counts its own work
+    with instrumentation.sampling():
+        find_chord([Pitch("G"), Pitch("C"), Pitch("E")])
+        rank_chords([Pitch("C"), Pitch("E"), Pitch("Bb")])
+    snapshot = instrumentation.snapshot()
+    assert snapshot["counters"]["find_chord.cache_hits"] == 1 and snapshot["counters"]["find_chord.probes"] == 2
+    assert snapshot["counters"]["rank_chords.roots"] >= 1
+
+
+def test_find_chord_result_cache():
+    from models import chord_finder
+    from models.chord_finder import lookup_chord, result_cache_info, result_cache_clear
+
+    result_cache_clear()
+    assert str(find_chord([Pitch("C#"), Pitch("F"), Pitch("G#")]).root) == "C#"
+    # Same pitch-class set, different spelling: cached, but the root is spelled from the input
+    chord = find_chord([Pitch("Ab"), Pitch("Db"), Pitch("F")])
+    assert str(chord.root) == "Db" and chord.quality == "major"
+    assert result_cache_info()["hits"] == 1 and result_cache_info()["misses"] == 1
+
+    # Symmetric chords still take their root from the caller's order
+    assert lookup_chord([Pitch("E"), Pitch("G#"), Pitch("C")]) == (4, "triad", "augmented")
+    assert lookup_chord([Pitch("C"), Pitch("E"), Pitch("G#")]) == (0, "triad", "augmented")
+    assert lookup_chord([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("C")]) is None
+    assert lookup_chord([Pitch("C"), Pitch("E"), Pitch("G"), Pitch("C")], allow_fuzzy=True) == (0, "triad", "major")
+
+    maxsize = chord_finder.result_cache_maxsize
+    try:
+        chord_finder.result_cache_maxsize = 2
+        for root in ["C", "D", "E"]:
+            find_chord([Pitch(root), Pitch("G"), Pitch("B")])
+        assert result_cache_info()["size"] == 2
+    finally:
+        chord_finder.result_cache_maxsize = maxsize
+    result_cache_clear()
+    assert result_cache_info() == {"hits": 0, "misses": 0, "size": 0, "maxsize": maxsize}
+
+
+def test_chord_transpose():
+    chord = SeventhChord(Pitch("G", 3), "dominant7", Key("G"))
+    copy = chord.transposed("m3")
+    assert chord.notes == [Pitch("G", 3), Pitch("B", 3), Pitch("D", 4), Pitch("F", 4)]
+    assert copy._notes is None and copy.pcs == [10, 2, 5, 8]
+    assert [str(note) for note in copy.notes] == ["Bb3", "D4", "F4", "Ab4"]
+    assert copy.key == Key("Bb") and copy.root is Pitch("Bb", 3)
+
+    triad = Triad(Pitch("C"), "major", Key("C"))
+    triad.add_note(Pitch("A"))
+    triad.transpose("P5")
+    triad.transpose("P4")
+    assert [str(note) for note in triad.notes] == ["C", "E", "G", "A"]
+
+    moved = transpose_all([triad, chord], "M2")
+    assert [str(c.root) for c in moved] == ["D", "A3"]
+    assert [str(note) for note in moved[1].notes] == ["A3", "C#4", "E4", "G4"]
+    with pytest.raises(ValueError):
+        transpose_all([triad], "P9")
+
+
+def test_chord_service_batches_requests():
+    import asyncio
+    import json
+    from models.service import ChordService, serve_tcp
+
+    async def run():
+        async with ChordService(max_batch=8, max_delay=0.01, max_pending=4) as service:
+            # Direct calls share batches; backpressure holds callers past max_pending
+            results = await asyncio.gather(*(service.identify([Pitch("G#"), Pitch("C"), Pitch("E")]) for _ in range(20)))
+            assert set(results) == {(Pitch("G#"), "triad", "augmented")}
+            assert service.stats()["batches"] < 20
+
+            server = await serve_tcp(service, port=0)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+            lines = [{"id": 1, "notes": ["Db4", "F4", "Ab4"]}, {"id": 2, "notes": ["C", "E", "G", "C#"], "fuzzy": True},
+                     {"id": 3, "notes": ["C", "D"]}, {"id": 4, "notes": ["H"]}]
+            writer.write("".join(json.dumps(line) + "\n" for line in lines).encode())
+            await writer.drain()
+            responses = {r["id"]: r for r in [json.loads(await reader.readline()) for _ in lines]}
+            writer.write(b'{"id": 5, "op": "stats"}\n')
+            await writer.drain()
+            stats = json.loads(await reader.readline())["stats"]
+            # Malformed notes get an error reply, and a crashing request leaves the batcher running
+            writer.write(b'{"id": 6, "notes": [1, 2]}\n')
+            await writer.drain()
+            responses[6] = json.loads(await asyncio.wait_for(reader.readline(), 1))
+            with pytest.raises(ValueError):
+                await asyncio.wait_for(service.identify(["C", "E", "G"]), 1)
+            assert await asyncio.wait_for(service.identify([Pitch("C"), Pitch("E"), Pitch("G")]), 1) is not None
+            writer.close()
+            server.close()
+            await server.wait_closed()
+        return responses, stats
+
+    responses, stats = asyncio.run(run())
+    assert responses[1]["chord"] == {"root": "Db4", "type": "triad", "quality": "major"}
+    assert responses[2]["chord"]["quality"] == "major"
+    assert responses[3]["chord"] is None and "error" in responses[4] and "error" in responses[6]
+    assert stats["requests"] == 23 and stats["p99_ms"] >= stats["p50_ms"] > 0
+
+
+def test_best_hands():
+    from models.deck import encode_card
+
+    pool = [Pitch(name, 4) for name in ["E", "G", "B", "D", "F#", "C", "A", "E"]]
+    best = best_hands(pool, top=3)
+    assert [hand.chord_type for hand in best] == ["ninth"] * 3
+    # Equal scores prefer fewer cards
+    assert [len(hand.cards) for hand in best] == sorted(len(hand.cards) for hand in best)
+    chord = best[0].chord()
+    assert chord.quality == best[0].quality and chord.root is best[0].root
+    assert find_chord(list(best[0].cards)).quality == best[0].quality
+
+    triads = best_hands(pool, k=3, top=50)
+    assert all(len(hand.cards) == 3 and hand.chord_type == "triad" for hand in triads)
+    assert {str(hand.root) + hand.quality for hand in triads} >= {"E4minor", "G4major", "C4major", "A4minor"}
+
+    # Encoded deck cards and a custom score order
+    cards = [encode_card(pitch) for pitch in pool]
+    prefer_triads = best_hands(cards, top=1, score=lambda chord_type, quality: chord_type == "triad")
+    assert prefer_triads[0].chord_type == "triad" and prefer_triads[0].root in cards
+    assert best_hands([Pitch("C"), Pitch("C#")]) == []
+    assert best_hands(pool, top=0) == []
+    # A spent budget still returns the first hand found, from the best group
+    rushed = best_hands(pool, top=5, budget=0)
+    assert len(rushed) == 1 and rushed[0].chord_type == "ninth"
+
+
+def test_binary_chord_index(tmp_path):
+    from models.chord_finder import chord_db
+    from models.chord_index import ChordIndex, MappedChordIndex, write_binary_index
+
+    path = str(tmp_path / "chords_index.bin")
+    write_binary_index(chord_db(), path)
+    mapped, built = MappedChordIndex(path), ChordIndex(chord_db())
+    assert mapped.entries == built.entries and mapped.types == built.types
+    assert list(mapped.lookup) == built.lookup
+    assert list(mapped.matches) == built.matches
+    # The shipped index is the one loaded, and is in step with the JSON
+    assert isinstance(CHORD_INDEX, MappedChordIndex) and CHORD_INDEX.entries == built.entries
+    entry = mapped.match(pc_mask([2, 6, 9, 0]), 2)
+    assert entry.quality == "dominant7"
+    assert mapped.spelled(mapped.entries.index(entry), "Db") == ["Db", "F", "Ab", "Cb"]
+
+    (tmp_path / "bad.bin").write_bytes(b"JUNK" + bytes(64))
+    with pytest.raises(ValueError):
+        MappedChordIndex(str(tmp_path / "bad.bin"))
+
+
+def test_stale_generated_chord_files_are_ignored(tmp_path, monkeypatch):
+    import json
+    from models import chord_finder
+    from models.chord_index import ChordIndex, MappedChordIndex, source_hash, write_binary_index
+
+    source, compact, binary = (str(tmp_path / name) for name in ["db.json", "db.min.json", "index.bin"])
+    edited = {"triad": {"C": {"major": {"notes": ["C", "E", "G"], "semitones": [0, 4, 7]}}}}
+    with open(source, "w") as f:
+        json.dump(edited, f)
+    # Generated from different JSON, and newer than the edited file: timestamps must not matter
+    with open(compact, "w") as f:
+        json.dump({"source": source_hash(chord_finder.CHORD_DB_PATH), "chords": chord_finder.chord_db()}, f)
+    write_binary_index(chord_finder.chord_db(), binary, source_hash(chord_finder.CHORD_DB_PATH))
+    os.utime(source, (1, 1))
+    monkeypatch.setattr(chord_finder, "CHORD_DB_PATH", source)
+    monkeypatch.setattr(chord_finder, "CHORD_DB_COMPACT_PATH", compact)
+    monkeypatch.setattr(chord_finder, "CHORD_INDEX_PATH", binary)
+    monkeypatch.setattr(chord_finder, "_chord_db", None)
+    monkeypatch.setattr(chord_finder, "_chord_index", None)
+
+    with pytest.warns(RuntimeWarning):
+        assert chord_finder.chord_db() == edited
+    with pytest.warns(RuntimeWarning):
+        index = chord_finder.chord_index()
+    assert type(index) is ChordIndex and len(index.entries) == 1
+
+    # Rebuilt from the edited JSON, the generated files are used again
+    write_binary_index(edited, binary, source_hash(source))
+    monkeypatch.setattr(chord_finder, "_chord_index", None)
+    index = chord_finder.chord_index()
+    assert isinstance(index, MappedChordIndex) and len(index.entries) == 1
+
+
+def test_voice_leading():
+    from models.voice_leading import cache_clear, cache_info
+
+    cache_clear()
+    c = Triad(Pitch("C"), "major", Key("C"))
+    f = Triad(Pitch("F"), "major", Key("F"))
+    g7 = SeventhChord(Pitch("G"), "dominant7", Key("G"))
+    am = Triad(Pitch("A"), "minor", Key("A"))
+    # G-B-D-F to C-E-G: B and D both resolve to C, F falls to E, G holds
+    leading = voice_leading(g7, c)
+    assert leading.distance == 4
+    assert {(str(a), str(b)) for a, b in leading.moves} == {("G", "G"), ("B", "C"), ("D", "C"), ("F", "E")}
+    assert voice_leading(c, g7).distance == 4
+    assert progression_distances([c, f, g7, c]) == [3, 5, 4]
+    assert [chord.quality for _, chord in rank_next(c, [g7, f, am])] == ["minor", "major", "dominant7"]
+    assert cache_info()["pitch_class"]["hits"] > 0
+
+    # With octaves the distance is in MIDI semitones, so the register matters
+    up = [Pitch("C", 4), Pitch("E", 4), Pitch("G", 4)]
+    assert voice_leading(up, [Pitch("B", 3), Pitch("D", 4), Pitch("G", 4)]).distance == 3
+    assert voice_leading(up, [Pitch("B", 4), Pitch("D", 5), Pitch("G", 5)]).distance == 33
+
+
+def test_voice_leading_matches_brute_force():
+    import itertools
+    import random
+
+    def distance(x, y):
+        return min((x - y) % 12, (y - x) % 12)
+
+    def brute_force(a, b):
+        # Every distinct matching of the smaller chord, plus the leftover notes from their nearest note
+        small, large = (a, b) if len(a) <= len(b) else (b, a)
+        best = None
+        for chosen in itertools.permutations(range(len(large)), len(small)):
+            total = sum(distance(small[i], large[j]) for i, j in enumerate(chosen))
+            total += sum(min(distance(x, large[j]) for x in small) for j in set(range(len(large))) - set(chosen))
+            best = total if best is None else min(best, total)
+        return best
+
+    names = Pitch.default_names
+    assert voice_leading([Pitch("C#"), Pitch("D"), Pitch("G#")], [Pitch("D"), Pitch("B")]).distance == 4
+    rng = random.Random(5)
+    for _ in range(500):
+        a, b = rng.sample(range(12), rng.randint(1, 6)), rng.sample(range(12), rng.randint(1, 6))
+        leading = voice_leading([Pitch(names[pc]) for pc in a], [Pitch(names[pc]) for pc in b])
+        assert leading.distance == brute_force(a, b)
+        assert leading.distance == sum(distance(x.pc, y.pc) for x, y in leading.moves)
+
+
+def test_session_snapshot_and_replay(tmp_path):
+    from models.deck import encode_card
+    from models.session import ActionLog
+
+    index = CHORD_INDEX
+    catalog = [Modifier("triad mult", mult=2, chord_type="triad"), Modifier("in key", chips=10, in_key=True)]
+    path = str(tmp_path / "actions.log")
+    deck = [encode_card(Pitch(name, 4)) for name in ["A", "C", "F", "D", "B", "G", "G", "E", "C"]]
+    session = Session(2, catalog=catalog, key=Key("C"), deck_cards=deck, log=ActionLog(path=path))
+    start = session.snapshot()
+    session.draw(0, 3)
+    assert session.play(0, [0, 1, 2]) == 30 * 3
+    assert session.players[0].chords == [(0, index.types.index("triad"), index.qualities.index("major"))]
+    session.add_modifier(0)
+    session.draw(1, 4)
+    middle = session.snapshot()
+    assert session.play(1, [0, 1, 2]) == 30 * 5  # G-B-D with the triad modifier
+    session.shuffle(seed=3)
+    session.draw(1, 2)
+    session.discard(1, [0])
+    session.log.close()
+    end = session.snapshot()
+
+    # Restoring and replaying land on byte-identical state, from the start or mid-session
+    assert Session.restore(end, catalog).snapshot() == end
+    assert replay(start, session.log, catalog).snapshot() == end
+    assert replay(middle, ActionLog.read(path), catalog).snapshot() == end
+    assert replay(start, bytes(session.log), catalog, until=2).players[0].score == 90
+    restored = Session.restore(end, catalog)
+    assert restored.players == session.players and restored.active == [0] and restored.key is Key("C")
+    with pytest.raises(ValueError):
+        Session.restore(b"JUNK" + end[4:])
+
+    # Rejected actions change nothing and are not logged
+    logged = bytes(session.log)
+    with pytest.raises(ValueError):
+        session.draw(0, 300)
+    with pytest.raises(ValueError):
+        session.shuffle(seed=-1)
+    with pytest.raises(ValueError):
+        session.play(1, [40])
+    with pytest.raises(IndexError):
+        session.discard(1, [5])
+    with pytest.raises(ValueError):
+        session.remove_modifier(1)
+    assert session.snapshot() == end and bytes(session.log) == logged
 
 
 